@@ -0,0 +1,152 @@
+"""
+Stand-in for the parts of ``Quartz`` the lock uses, for footprint runs.
+
+Unlike the MagicMock in ``tests/conftest.py`` this behaves like the real
+thing where it matters for idle cost: ``CFRunLoopRun`` blocks until
+``CFRunLoopStop`` and costs nothing while it waits. With ``STORM_HZ`` set,
+the run loop instead delivers synthetic input to the tap callback at that
+rate, on the tap thread, in ticks of ``STORM_TICK_MS`` like a USB poll.
+
+``on_run`` is called (on the tap thread) once the run loop is running.
+"""
+
+import threading
+import time
+
+kCGEventLeftMouseDown = 1
+kCGEventLeftMouseUp = 2
+kCGEventRightMouseDown = 3
+kCGEventRightMouseUp = 4
+kCGEventMouseMoved = 5
+kCGEventLeftMouseDragged = 6
+kCGEventRightMouseDragged = 7
+kCGEventKeyDown = 10
+kCGEventKeyUp = 11
+kCGEventScrollWheel = 22
+kCGEventTabletPointer = 23
+kCGEventTabletProximity = 24
+kCGEventOtherMouseDown = 25
+kCGEventOtherMouseUp = 26
+kCGEventOtherMouseDragged = 27
+kCGEventTapDisabledByTimeout = 0xFFFFFFFE
+kCGEventTapDisabledByUserInput = 0xFFFFFFFF
+
+kCGSessionEventTap = 1
+kCGHeadInsertEventTap = 0
+kCGEventTapOptionDefault = 0
+kCGKeyboardEventKeycode = 9
+kCGEventSourceStateHIDSystemState = 1
+kCGEventSourceUnixProcessID = 41
+kCFAllocatorDefault = None
+kCFRunLoopCommonModes = "kCFRunLoopCommonModes"
+
+STORM_HZ = 0
+STORM_TICK_MS = 8
+# Keycode of the key mashed during a storm (A, not part of the chord).
+STORM_KEYCODE = 0
+
+on_run = None
+
+
+class Event:
+    __slots__ = ("keycode", "timestamp")
+
+    def __init__(self, keycode, timestamp):
+        self.keycode = keycode
+        self.timestamp = timestamp
+
+
+class Tap:
+    def __init__(self, callback, refcon):
+        self.callback = callback
+        self.refcon = refcon
+        self.enabled = False
+
+
+class RunLoop:
+    def __init__(self):
+        self.sources = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        if on_run is not None:
+            on_run()
+        if not STORM_HZ:
+            self.stopped.wait()
+            return
+        tick = STORM_TICK_MS / 1000
+        per_tick = max(1, round(STORM_HZ * tick))
+        n = 0
+        while not self.stopped.wait(tick):
+            for tap in self.sources:
+                if not tap.enabled:
+                    continue
+                for _ in range(per_tick):
+                    # Mostly pointer motion, with a key tapped now and then.
+                    n += 1
+                    kind = n % 20
+                    event_type = (kCGEventKeyDown if kind == 0 else
+                                  kCGEventKeyUp if kind == 1 else kCGEventMouseMoved)
+                    tap.callback(None, event_type,
+                                 Event(STORM_KEYCODE, time.monotonic_ns()), tap.refcon)
+
+
+_loops = threading.local()
+
+
+def CGEventTapCreate(tap, place, options, mask, callback, refcon):
+    return Tap(callback, refcon)
+
+
+def CGEventTapEnable(tap, enable):
+    tap.enabled = enable
+
+
+def CFMachPortCreateRunLoopSource(allocator, tap, order):
+    return tap
+
+
+def CFRunLoopGetCurrent():
+    loop = getattr(_loops, "loop", None)
+    if loop is None:
+        loop = _loops.loop = RunLoop()
+    return loop
+
+
+def CFRunLoopAddSource(loop, source, mode):
+    loop.sources.append(source)
+
+
+def CFRunLoopRun():
+    loop = CFRunLoopGetCurrent()
+    loop.run()
+    _loops.loop = None
+
+
+def CFRunLoopStop(loop):
+    loop.stopped.set()
+
+
+def CFRunLoopPerformBlock(loop, mode, block):
+    block()
+
+
+def CFRunLoopWakeUp(loop):
+    pass
+
+
+def CFRelease(obj):
+    pass
+
+
+def CGEventGetIntegerValueField(event, field):
+    # Storm events are hardware input: no posting process.
+    return 0 if field == kCGEventSourceUnixProcessID else event.keycode
+
+
+def CGEventGetTimestamp(event):
+    return event.timestamp
+
+
+def CGEventSourceKeyState(state, keycode):
+    return False
@@ -0,0 +1,282 @@
+"""
+Idle-footprint benchmark for the CLI and the GUI (Linux, headless).
+
+Each scenario starts the app in a child process against stand-in backends
+(``benchmarks/fake_quartz.py`` for Quartz, ``QT_QPA_PLATFORM=offscreen``
+for the GUI) and drives it into a state:
+
+``ready``   started, not locked (the CLI has loaded config and backend)
+``locked``  locked, no input
+``storm``   locked while the tap receives ``STORM_HZ`` synthetic events/s
+
+The parent then samples ``/proc`` over a window: resident memory, thread
+count, CPU time and voluntary context switches (each one a thread going to
+sleep and being woken again, so a wakeup). Results are written as JSON and
+compared to ``benchmarks/baseline.json``::
+
+    python -m benchmarks.footprint                    # run all, compare
+    python -m benchmarks.footprint cli/locked --seconds 10
+    python -m benchmarks.footprint --update-baseline
+
+Numbers are machine-specific; refresh the baseline on the machine that
+compares against it. The storm tick itself accounts for 125 wakeups/s.
+"""
+
+import argparse
+import json
+import os
+import platform
+import select
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+APPS = ("cli", "gui")
+STATES = ("ready", "locked", "storm")
+SCENARIOS = tuple(f"{app}/{state}" for app in APPS for state in STATES)
+
+SECONDS = 3.0
+SETTLE_SECONDS = 0.5
+STORM_HZ = 1000
+
+# metric -> (relative, absolute) headroom over the baseline before a
+# result counts as a regression.
+TOLERANCE = {
+    "rss_mb": (0.15, 2.0),
+    "threads": (0.0, 0.0),
+    "cpu_percent": (0.5, 0.5),
+    "wakeups_per_s": (0.5, 5.0),
+}
+
+
+# ---- /proc sampling ------------------------------------------------------
+def _status(path):
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value.split()
+    return fields
+
+
+def read_proc(pid):
+    """Point-in-time counters of ``pid`` from ``/proc``."""
+    status = _status(f"/proc/{pid}/status")
+    with open(f"/proc/{pid}/stat") as f:
+        # Fields after the parenthesised command; utime and stime are 14, 15.
+        stat = f.read().rsplit(")", 1)[1].split()
+    switches = 0
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        try:
+            switches += int(_status(f"/proc/{pid}/task/{tid}/status")
+                            ["voluntary_ctxt_switches"][0])
+        except (OSError, KeyError):
+            continue  # thread exited while listing
+    return {
+        "time": time.monotonic(),
+        "rss_kb": int(status["VmRSS"][0]),
+        "threads": int(status["Threads"][0]),
+        "cpu_ticks": int(stat[11]) + int(stat[12]),
+        "switches": switches,
+    }
+
+
+def measure(pid, seconds):
+    """Sample ``pid`` over ``seconds``; RSS and threads are end-of-window."""
+    start = read_proc(pid)
+    time.sleep(seconds)
+    end = read_proc(pid)
+    elapsed = end["time"] - start["time"]
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "rss_mb": round(end["rss_kb"] / 1024, 1),
+        "threads": end["threads"],
+        "cpu_percent": round(100 * (end["cpu_ticks"] - start["cpu_ticks"])
+                             / ticks / elapsed, 2),
+        "wakeups_per_s": round((end["switches"] - start["switches"]) / elapsed, 1),
+    }
+
+
+# ---- child process ---------------------------------------------------------
+def _load_script(name, filename):
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _signal_ready():
+    print("ready", flush=True)
+
+
+def child(app, state):
+    """Runs in the child: fake Quartz, then the real app driven into ``state``."""
+    from benchmarks import fake_quartz
+
+    sys.modules["Quartz"] = fake_quartz
+    if state == "storm":
+        fake_quartz.STORM_HZ = STORM_HZ
+    if state != "ready":
+        fake_quartz.on_run = _signal_ready
+
+    if app == "cli":
+        cli = _load_script("macos_lock_cli", "macos-lock.py")
+        if state == "ready":
+            from macos_lock.backends import load_backend
+            from macos_lock.config import load_config
+
+            cli.install_profiler()
+            load_backend("quartz")[0].from_config(load_config())
+            _signal_ready()
+            while True:
+                time.sleep(3600)
+        cli.main(["--backend", "quartz"])
+        return
+
+    gui = _load_script("macos_lock_gui", "macos-lock-gui.py")
+    from PyQt6.QtCore import QTimer
+
+    class Window(gui.LockWindow):
+        def __init__(self):
+            super().__init__()
+            if state == "ready":
+                QTimer.singleShot(0, _signal_ready)
+            else:
+                QTimer.singleShot(0, self._toggle_lock)
+
+    gui.LockWindow = Window
+    gui.main()
+
+
+# ---- scenarios -------------------------------------------------------------
+def run_scenario(name, seconds=SECONDS, settle=SETTLE_SECONDS, timeout=30.0):
+    """Start the child for ``name``, wait until it is in state, measure it."""
+    app, state = name.split("/")
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, QT_QPA_PLATFORM="offscreen",
+                   PYTHONPATH=ROOT)
+        env.pop("MACOS_LOCK_PROFILE", None)
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.footprint", "--child", app, state],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            ready, _, _ = select.select([proc.stdout], [], [], timeout)
+            if not ready or proc.stdout.readline().strip() != "ready":
+                raise RuntimeError(f"{name}: child did not reach its state "
+                                   f"(exit code {proc.poll()})")
+            time.sleep(settle)
+            return measure(proc.pid, seconds)
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+def gui_available():
+    try:
+        import PyQt6.QtWidgets  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run(names=SCENARIOS, seconds=SECONDS):
+    results = {}
+    for name in names:
+        if name.startswith("gui/") and not gui_available():
+            print(f"{name}: skipped (PyQt6 not installed)", file=sys.stderr)
+            continue
+        results[name] = run_scenario(name, seconds)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seconds": seconds,
+        "storm_hz": STORM_HZ,
+        "scenarios": results,
+    }
+
+
+# ---- baseline --------------------------------------------------------------
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Return ``(scenario, metric, value, limit)`` for every regression."""
+    regressions = []
+    for name, metrics in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for metric, (rel, abs_) in tolerance.items():
+            if metric not in base or metric not in metrics:
+                continue
+            limit = base[metric] * (1 + rel) + abs_
+            if metrics[metric] > limit:
+                regressions.append((name, metric, metrics[metric], limit))
+    return regressions
+
+
+def format_table(results, baseline=None):
+    base = (baseline or {}).get("scenarios", {})
+    lines = [f"{'scenario':<12} " + " ".join(f"{m:>16}" for m in TOLERANCE)]
+    for name, metrics in results["scenarios"].items():
+        cells = []
+        for metric in TOLERANCE:
+            cell = f"{metrics[metric]:g}"
+            if metric in base.get(name, {}):
+                cell += f" ({base[name][metric]:g})"
+            cells.append(f"{cell:>16}")
+        lines.append(f"{name:<12} " + " ".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--seconds", type=float, default=SECONDS,
+                        help="measurement window per scenario (default: %(default)s)")
+    parser.add_argument("--output", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH, metavar="PATH")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store the results as the new baseline")
+    parser.add_argument("--child", nargs=2, metavar=("APP", "STATE"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(*args.child)
+        return 0
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(sorted(unknown))}")
+
+    results = run(args.scenarios or SCENARIOS, args.seconds)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(format_table(results))
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_table(results, baseline))
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline)
+    for name, metric, value, limit in regressions:
+        print(f"REGRESSION {name} {metric}: {value:g} > {limit:g}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
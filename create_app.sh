@@ -45,6 +45,7 @@ EOF
 # Kopiere Python-Scripts und Icon
 cp macos-lock-gui.py "$RESOURCES_DIR/"
 cp macos-lock.py "$RESOURCES_DIR/"
+cp -R macos_lock "$RESOURCES_DIR/"
 cp macos-lock.png "$RESOURCES_DIR/"
 
 # Erstelle Launcher-Script
@@ -3,10 +3,9 @@
 macOS Lock GUI - Security app with PyQt6 interface (stupidisco theme).
 """
 
+import signal
+import socket
 import sys
-import os
-import json
-import threading
 import subprocess
 
 import Quartz
@@ -21,50 +20,13 @@ from PyQt6.QtWidgets import (
     QDialog,
     QMessageBox,
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QObject
+from PyQt6.QtCore import Qt, pyqtSignal, QObject, QSocketNotifier
 from PyQt6.QtGui import QPainter, QColor, QPainterPath, QBrush
 
-# ---------------------------------------------------------------------------
-# Config
-# ---------------------------------------------------------------------------
-CONFIG_PATH = os.path.expanduser("~/.macos-lock-config.json")
-
-KEYCODE_MAP = {
-    "a": 0, "s": 1, "d": 2, "f": 3, "h": 4, "g": 5, "z": 6, "x": 7,
-    "c": 8, "v": 9, "b": 11, "q": 12, "w": 13, "e": 14, "r": 15,
-    "y": 16, "t": 17, "1": 18, "2": 19, "3": 20, "4": 21, "6": 22,
-    "5": 23, "=": 24, "9": 25, "7": 26, "-": 27, "8": 28, "0": 29,
-    "]": 30, "o": 31, "u": 32, "[": 33, "i": 34, "p": 35, "l": 37,
-    "j": 38, "'": 39, "k": 40, ";": 41, "\\": 42, ",": 43, "/": 44,
-    "n": 45, "m": 46, ".": 47, "`": 50, "space": 49, "return": 36,
-    "tab": 48, "escape": 53, "delete": 51,
-}
-
-REVERSE_KEYCODE_MAP = {v: k for k, v in KEYCODE_MAP.items()}
-
-DEFAULT_CONFIG = {"unlock_keys": ["x", "c"]}
-
-
-def load_config():
-    if os.path.exists(CONFIG_PATH):
-        try:
-            with open(CONFIG_PATH, "r") as f:
-                saved = json.load(f)
-            cfg = DEFAULT_CONFIG.copy()
-            cfg.update(saved)
-            return cfg
-        except (json.JSONDecodeError, IOError):
-            pass
-    return DEFAULT_CONFIG.copy()
-
-
-def save_config(config):
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(config, f, indent=2)
-
-
-def keys_to_keycodes(keys):
-    return [KEYCODE_MAP[k] for k in keys if k in KEYCODE_MAP]
+from macos_lock.config import ConfigWriter, load_config, unlock_keycodes
+from macos_lock.keylayout import current_layout, keycode_name
+from macos_lock.locker import EVENT_NAMES, InputLocker
+from macos_lock.profiler import install as install_profiler
 
 
 # ---------------------------------------------------------------------------
@@ -232,96 +194,6 @@ class UnlockSignal(QObject):
     unlocked = pyqtSignal()
 
 
-# ---------------------------------------------------------------------------
-# Input Locker (Quartz Event Tap)
-# ---------------------------------------------------------------------------
-class InputLocker:
-    def __init__(self, unlock_keycodes=None):
-        self.locked = False
-        self.pressed_keys = set()
-        self.tap = None
-        self.run_loop_source = None
-        self.lock_thread = None
-        self.unlock_keycodes = set(unlock_keycodes or [7, 8])
-        self.signal = UnlockSignal()
-
-    def set_unlock_keycodes(self, keycodes):
-        self.unlock_keycodes = set(keycodes)
-
-    def event_callback(self, proxy, event_type, event, refcon):
-        if not self.locked:
-            return event
-
-        if event_type in [Quartz.kCGEventKeyDown, Quartz.kCGEventKeyUp]:
-            keycode = Quartz.CGEventGetIntegerValueField(
-                event, Quartz.kCGKeyboardEventKeycode
-            )
-            if event_type == Quartz.kCGEventKeyDown:
-                self.pressed_keys.add(keycode)
-            elif event_type == Quartz.kCGEventKeyUp:
-                self.pressed_keys.discard(keycode)
-
-            if self.unlock_keycodes.issubset(self.pressed_keys):
-                self.unlock()
-                return event
-
-        return None
-
-    def lock(self):
-        self.locked = True
-        self.pressed_keys.clear()
-
-        event_mask = (
-            (1 << Quartz.kCGEventKeyDown)
-            | (1 << Quartz.kCGEventKeyUp)
-            | (1 << Quartz.kCGEventLeftMouseDown)
-            | (1 << Quartz.kCGEventLeftMouseUp)
-            | (1 << Quartz.kCGEventRightMouseDown)
-            | (1 << Quartz.kCGEventRightMouseUp)
-            | (1 << Quartz.kCGEventMouseMoved)
-            | (1 << Quartz.kCGEventLeftMouseDragged)
-            | (1 << Quartz.kCGEventRightMouseDragged)
-            | (1 << Quartz.kCGEventScrollWheel)
-            | (1 << Quartz.kCGEventOtherMouseDown)
-            | (1 << Quartz.kCGEventOtherMouseUp)
-        )
-
-        self.tap = Quartz.CGEventTapCreate(
-            Quartz.kCGSessionEventTap,
-            Quartz.kCGHeadInsertEventTap,
-            Quartz.kCGEventTapOptionDefault,
-            event_mask,
-            self.event_callback,
-            None,
-        )
-        if not self.tap:
-            return False
-
-        self.run_loop_source = Quartz.CFMachPortCreateRunLoopSource(
-            Quartz.kCFAllocatorDefault, self.tap, 0
-        )
-        self.lock_thread = threading.Thread(target=self._run_loop)
-        self.lock_thread.daemon = True
-        self.lock_thread.start()
-        return True
-
-    def _run_loop(self):
-        Quartz.CFRunLoopAddSource(
-            Quartz.CFRunLoopGetCurrent(),
-            self.run_loop_source,
-            Quartz.kCFRunLoopCommonModes,
-        )
-        Quartz.CGEventTapEnable(self.tap, True)
-        Quartz.CFRunLoopRun()
-
-    def unlock(self):
-        self.locked = False
-        if self.tap:
-            Quartz.CGEventTapEnable(self.tap, False)
-            Quartz.CFRunLoopStop(Quartz.CFRunLoopGetCurrent())
-        self.signal.unlocked.emit()
-
-
 # ---------------------------------------------------------------------------
 # Settings Dialog
 # ---------------------------------------------------------------------------
@@ -406,18 +278,9 @@ class SettingsDialog(QDialog):
 
     @staticmethod
     def _qt_key_to_name(event):
-        text = event.text().lower()
-        if len(text) == 1 and text in KEYCODE_MAP:
-            return text
-        special = {
-            Qt.Key.Key_Space: "space",
-            Qt.Key.Key_Return: "return",
-            Qt.Key.Key_Enter: "return",
-            Qt.Key.Key_Tab: "tab",
-            Qt.Key.Key_Escape: "escape",
-            Qt.Key.Key_Backspace: "delete",
-        }
-        return special.get(event.key())
+        # The macOS virtual keycode identifies the physical key regardless
+        # of layout; the name is what that key types on the active layout.
+        return keycode_name(event.nativeVirtualKey())
 
     def _save(self):
         if len(self.captured_keys) >= 2:
@@ -436,12 +299,34 @@ class LockWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.config = load_config()
+        self.config_writer = ConfigWriter().start()
+        # Re-read the layout table when the user switches input source.
+        current_layout().watch()
         self.is_locked = False
         self._drag_pos = None
 
-        keycodes = keys_to_keycodes(self.config["unlock_keys"])
-        self.locker = InputLocker(unlock_keycodes=keycodes)
-        self.locker.signal.unlocked.connect(self._on_silent_unlock)
+        keycodes = unlock_keycodes(self.config)
+        self.unlock_signal = UnlockSignal()
+        self.unlock_signal.unlocked.connect(self._on_silent_unlock)
+        # Called on the tap thread for chord unlocks; the signal hops to Qt.
+        self.locker = InputLocker(
+            unlock_keycodes=keycodes,
+            hold_ms=self.config["unlock_hold_ms"],
+            on_unlock=lambda reason: self.unlock_signal.unlocked.emit(),
+            passthrough_apps=self.config["passthrough_apps"],
+        )
+
+        self.audit = None
+        if self.config.get("audit_log"):
+            from macos_lock.audit import AuditLog
+
+            self.audit = AuditLog(
+                counts=self.locker.blocked_counts, type_names=EVENT_NAMES
+            ).start()
+            self.locker.listeners.append(self.audit.listener)
+
+        # Created on the first lock; the per-screen windows are reused.
+        self.overlay = None
 
         self._init_ui()
 
@@ -557,6 +442,8 @@ class LockWindow(QMainWindow):
             if not self._check_accessibility():
                 self._show_accessibility_dialog()
                 return
+            # Names follow the active layout, which may have changed.
+            self.locker.set_unlock_keycodes(unlock_keycodes(self.config))
             if self.locker.lock():
                 self.is_locked = True
                 self.icon_label.setText("\U0001f513")
@@ -566,9 +453,12 @@ class LockWindow(QMainWindow):
                 self.lock_btn.setObjectName("unlock")
                 self.lock_btn.setStyleSheet(STYLESHEET)
                 self.settings_btn.setEnabled(False)
-                self.showMinimized()
+                if self.config.get("show_overlay"):
+                    self._show_overlay()
+                else:
+                    self.showMinimized()
         else:
-            self.locker.unlock()
+            self.locker.unlock("button")
             self._reset_ui()
             self.showNormal()
             self.raise_()
@@ -578,8 +468,20 @@ class LockWindow(QMainWindow):
         """Called via signal when unlocked with keyboard shortcut - stays minimized."""
         self._reset_ui()
 
+    def _show_overlay(self):
+        if self.overlay is None:
+            from macos_lock.overlay import OverlayManager
+
+            self.overlay = OverlayManager(self.locker.blocked_counts)
+        # The chord in effect: X + C if the saved keys did not resolve.
+        keys = " + ".join(keycode_name(k).upper()
+                          for k in sorted(self.locker.unlock_keycodes))
+        self.overlay.show(f"Press {keys} to unlock")
+
     def _reset_ui(self):
         self.is_locked = False
+        if self.overlay is not None:
+            self.overlay.hide()
         self.icon_label.setText("\U0001f512")
         self.status_label.setText("Ready")
         self.status_label.setStyleSheet("color: #8a8a8e;")
@@ -596,8 +498,8 @@ class LockWindow(QMainWindow):
 
     def _apply_new_keys(self, new_keys):
         self.config["unlock_keys"] = new_keys
-        save_config(self.config)
-        self.locker.set_unlock_keycodes(keys_to_keycodes(new_keys))
+        self.config_writer.submit(self.config)
+        self.locker.set_unlock_keycodes(unlock_keycodes(self.config))
         display = " + ".join(k.upper() for k in new_keys)
         self.shortcut_label.setText(f"Unlock:  {display}")
 
@@ -634,19 +536,46 @@ class LockWindow(QMainWindow):
     # ---- close ------------------------------------------------------------
     def closeEvent(self, event):
         if self.is_locked:
-            self.locker.unlock()
+            self.locker.unlock("close")
+        if self.audit is not None:
+            self.audit.stop()
+        self.config_writer.stop()
         event.accept()
 
 
 # ---------------------------------------------------------------------------
 # main
 # ---------------------------------------------------------------------------
+def wake_on_signals(parent):
+    """Give Python control when a signal arrives while Qt's loop sleeps.
+
+    Python only runs signal handlers when it gets control. The C-level
+    handler writes to a socket and the notifier's slot gives it that, so
+    there are no wakeups while no signal arrives.
+    """
+    reader, writer = socket.socketpair()
+    reader.setblocking(False)
+    writer.setblocking(False)
+    signal.set_wakeup_fd(writer.fileno())
+    notifier = QSocketNotifier(reader.fileno(), QSocketNotifier.Type.Read, parent)
+    notifier.activated.connect(lambda *args: reader.recv(64))
+    # The sockets must live as long as the notifier.
+    notifier.sockets = (reader, writer)
+    return notifier
+
+
 def main():
+    # Before Qt starts threads, so they inherit the blocked profiler signal.
+    profiler = install_profiler()
     app = QApplication(sys.argv)
     app.setApplicationName("macOS Lock")
+    wake_on_signals(app)
     window = LockWindow()
     window.show()
-    sys.exit(app.exec())
+    status = app.exec()
+    if profiler.running:
+        profiler.stop()
+    sys.exit(status)
 
 
 if __name__ == "__main__":
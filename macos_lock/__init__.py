@@ -0,0 +1,16 @@
+"""
+macOS Lock - importable core.
+
+The public API is loaded lazily so ``import macos_lock`` stays cheap for the
+CLI; ``macos_lock.locked`` pulls in asyncio only when first used.
+"""
+
+__all__ = ["locked", "LockSession", "LockError", "MAX_LOCK_SECONDS"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from macos_lock import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module 'macos_lock' has no attribute {name!r}")
@@ -0,0 +1,157 @@
+"""
+Programmatic locking API (sync and asyncio).
+
+    with macos_lock.locked(timeout=60) as session:
+        run_update()
+
+    async with macos_lock.locked(profile="keyboard-only", timeout=300) as session:
+        await run_update()
+        reason = await session   # wait for the user to unlock
+
+The lock is held on the locker's own run-loop thread, so neither variant
+blocks the calling thread or the event loop. ``timeout`` is a failsafe:
+the lock is always released after that many seconds, and never held
+longer than ``MAX_LOCK_SECONDS`` (also when ``timeout`` is None or 0).
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+from macos_lock import config
+from macos_lock.locker import InputLocker
+
+# Upper bound for every API lock; larger or missing timeouts are clamped.
+MAX_LOCK_SECONDS = 600
+
+
+class LockError(RuntimeError):
+    """Raised when the event tap cannot be installed."""
+
+
+class LockSession:
+    """One lock, from ``start()`` until the first unlock.
+
+    ``unlocked`` is a :class:`concurrent.futures.Future` resolved with the
+    unlock reason (``"chord"``, ``"timeout"`` or ``"api"``). Awaiting the
+    session itself waits for that future.
+    """
+
+    def __init__(self, profile="full", timeout=MAX_LOCK_SECONDS,
+                 unlock_keycodes=None, hold_ms=None, backend=None):
+        self.profile = profile
+        self.timeout = min(timeout or MAX_LOCK_SECONDS, MAX_LOCK_SECONDS)
+        self.unlock_keycodes = unlock_keycodes
+        self.hold_ms = hold_ms
+        self.backend = backend or InputLocker
+        self.unlocked = concurrent.futures.Future()
+        self.locker = None
+        self.audit = None
+        self._timer = None
+        self._release = None
+
+    @property
+    def locked(self):
+        return self.locker is not None and not self.unlocked.done()
+
+    def start(self):
+        if self.locker is not None:
+            raise LockError("Session already started")
+        # Explicit arguments win over the config; the backend maps the rest,
+        # e.g. X11 resolves the configured key names on its own display.
+        overrides = {}
+        if self.unlock_keycodes:
+            overrides["unlock_keycodes"] = self.unlock_keycodes
+        if self.hold_ms is not None:
+            overrides["hold_ms"] = self.hold_ms
+        cfg = config.load_config()
+        self.locker = self.backend.from_config(
+            cfg, profile=self.profile, on_unlock=self._on_unlock, **overrides
+        )
+        if cfg.get("audit_log"):
+            from macos_lock.audit import AuditLog
+
+            self.audit = AuditLog(counts=self.locker.blocked_counts,
+                                  type_names=self.locker.event_names).start()
+            self.locker.listeners.append(self.audit.listener)
+        if not self.locker.lock():
+            self.locker = None
+            self._stop_audit()
+            raise LockError(
+                "Could not create Event Tap - grant Accessibility access in "
+                "System Settings > Privacy & Security > Accessibility"
+            )
+        self._timer = threading.Timer(self.timeout, self.stop, args=("timeout",))
+        self._timer.daemon = True
+        self._timer.start()
+        return self
+
+    def stop(self, reason="api"):
+        if self.locker is not None:
+            self.locker.unlock(reason)
+        self._cancel_timer()
+        self._stop_audit()
+
+    def wait(self, timeout=None):
+        """Block until unlocked and return the reason."""
+        return self.unlocked.result(timeout)
+
+    def _on_unlock(self, reason):
+        self._cancel_timer()
+        if not self.unlocked.done():
+            self.unlocked.set_result(reason)
+
+    def _stop_audit(self):
+        audit, self.audit = self.audit, None
+        if audit is not None:
+            audit.stop()
+
+    def _cancel_timer(self):
+        timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+
+    # ---- sync context manager ---------------------------------------------
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    # ---- asyncio ----------------------------------------------------------
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        started = loop.run_in_executor(None, self.start)
+        try:
+            await asyncio.shield(started)
+        except asyncio.CancelledError:
+            # start() runs on in the worker and __aexit__ will not be called:
+            # release the lock it takes before passing the cancellation on.
+            self._release = asyncio.ensure_future(self._stop_when_started(started))
+            await asyncio.shield(self._release)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.stop)
+        return False
+
+    async def _stop_when_started(self, started):
+        try:
+            await started
+        except LockError:
+            return  # nothing was locked
+        await asyncio.get_running_loop().run_in_executor(None, self.stop)
+
+    def __await__(self):
+        return asyncio.wrap_future(self.unlocked).__await__()
+
+
+def locked(profile="full", timeout=MAX_LOCK_SECONDS, unlock_keycodes=None,
+           hold_ms=None, backend=None):
+    """Return a :class:`LockSession` usable with ``with`` or ``async with``."""
+    return LockSession(profile=profile, timeout=timeout,
+                       unlock_keycodes=unlock_keycodes, hold_ms=hold_ms,
+                       backend=backend)
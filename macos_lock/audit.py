@@ -0,0 +1,280 @@
+"""
+Append-only audit log of lock sessions.
+
+One JSON line per session::
+
+    {"start": 1760000000.0, "end": 1760000042.5, "duration": 42.5,
+     "reason": "chord", "blocked": {"mouse_moved": 812, "key_down": 9},
+     "blocked_total": 821}
+
+The locker listener only puts ``(kind, time, fields)`` on a queue; the
+background writer builds the session records, appends them in batches and
+rotates the active file by size or age. Rotated files are gzip-compressed
+under a temporary name and renamed into place; a rotation cut short by a
+crash is finished on the next start. Reading streams line by line over all
+files, oldest first.
+
+    python -m macos_lock.audit --since 2026-10-01 --reason chord
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+import zlib
+
+AUDIT_PATH = os.path.expanduser("~/.macos-lock/audit.jsonl")
+
+MAX_BYTES = 1 << 20
+MAX_AGE = 7 * 24 * 3600
+KEEP_ROTATED = 20
+
+UNLOCK_EVENTS = ("unlock_matched", "unlocked")
+
+
+class AuditLog:
+    """Background writer for lock session records.
+
+    ``counts`` is the locker's blocked-event counter dict and ``type_names``
+    maps its event types to names; the writer diffs snapshots of it taken
+    at lock start and unlock.
+    """
+
+    def __init__(self, path=None, counts=None, type_names=None,
+                 max_bytes=MAX_BYTES, max_age=MAX_AGE, keep=KEEP_ROTATED,
+                 flush_interval=1.0):
+        self.path = path or AUDIT_PATH
+        self.counts = counts if counts is not None else {}
+        self.type_names = type_names or {}
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep = keep
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._session = None
+        self._opened_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- producer side ----------------------------------------------------
+    def listener(self, kind, fields):
+        """Locker listener: never touches the file.
+
+        Snapshots the (small, fixed-size) counter dict so session totals are
+        exact even though the writer runs later.
+        """
+        if kind == "lock_started" or kind in UNLOCK_EVENTS:
+            fields = dict(fields, counts=dict(self.counts))
+        self._queue.put((kind, time.time(), fields))
+
+    # ---- writer thread ----------------------------------------------------
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="macos-lock-audit", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Flush pending records; a session still open is closed as ``exit``."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.recover()
+        self._opened_at = _first_start(self.path)
+        while not self._stop.wait(self.flush_interval):
+            self._write(self._drain())
+        records = self._drain()
+        if self._session is not None:
+            records.append(self._close_session(time.time(), "exit", dict(self.counts)))
+        self._write(records)
+
+    def _drain(self):
+        records = []
+        while True:
+            try:
+                kind, ts, fields = self._queue.get_nowait()
+            except queue.Empty:
+                return records
+            if kind == "lock_started":
+                counts = fields.get("counts", {})
+                if self._session is not None:
+                    records.append(self._close_session(ts, "relock", counts))
+                self._session = (ts, counts)
+            elif kind in UNLOCK_EVENTS and self._session is not None:
+                records.append(self._close_session(
+                    ts, fields.get("reason", "unknown"), fields.get("counts", {})
+                ))
+
+    def _close_session(self, end, reason, counts):
+        start, baseline = self._session
+        self._session = None
+        blocked = {}
+        for event_type, count in counts.items():
+            diff = count - baseline.get(event_type, 0)
+            if diff:
+                blocked[self.type_names.get(event_type, str(event_type))] = diff
+        return {
+            "start": start,
+            "end": end,
+            "duration": round(end - start, 3),
+            "reason": reason,
+            "blocked": blocked,
+            "blocked_total": sum(blocked.values()),
+        }
+
+    def _write(self, records):
+        if not records:
+            return
+        if self._should_rotate(records[0]["end"]):
+            self.rotate()
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        with open(self.path, "a") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if self._opened_at is None:
+            self._opened_at = records[0]["start"]
+
+    def _should_rotate(self, now):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+        if size >= self.max_bytes:
+            return True
+        return self._opened_at is not None and now - self._opened_at >= self.max_age
+
+    def rotate(self):
+        """Compress the active file to ``<name>-<timestamp>.jsonl.gz``."""
+        if not os.path.exists(self.path):
+            return None
+        tmp = rotating_path(self.path)
+        os.replace(self.path, tmp)
+        target = self._compress(tmp, time.time())
+        self._opened_at = None
+        for old in rotated_files(self.path)[:-self.keep or None]:
+            os.remove(old)
+        return target
+
+    def recover(self):
+        """Finish a rotation that a crash interrupted."""
+        for partial in _log_files(self.path, ".gz.tmp"):
+            os.remove(partial)
+        tmp = rotating_path(self.path)
+        if os.path.exists(tmp):
+            self._compress(tmp, os.path.getmtime(tmp))
+
+    def _compress(self, src, when):
+        """Gzip ``src`` to its rotated name, then remove it.
+
+        The archive only gets its final name once it is complete and
+        synced, so a crash leaves ``src`` in place, never a truncated ``.gz``.
+        """
+        # Named by rotation time so names sort chronologically.
+        stamp = datetime.datetime.fromtimestamp(when).strftime("%Y%m%dT%H%M%S%f")
+        base, ext = os.path.splitext(self.path)
+        target = f"{base}-{stamp}{ext}.gz"
+        partial = target + ".tmp"
+        with open(src, "rb") as f, open(partial, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                shutil.copyfileobj(f, dst)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(partial, target)
+        os.remove(src)
+        return target
+
+
+def _first_start(path):
+    try:
+        with open(path) as f:
+            return json.loads(f.readline())["start"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def rotating_path(path):
+    return path + ".rotating"
+
+
+def _log_files(path, suffix):
+    directory = os.path.dirname(path) or "."
+    base, ext = os.path.splitext(os.path.basename(path))
+    prefix, suffix = base + "-", ext + suffix
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in names
+        if name.startswith(prefix) and name.endswith(suffix)
+    )
+
+
+def rotated_files(path=AUDIT_PATH):
+    return _log_files(path, ".gz")
+
+
+def _lines(name):
+    opener = gzip.open if name.endswith(".gz") else open
+    try:
+        with opener(name, "rt") as f:
+            yield from f
+    except (EOFError, OSError, zlib.error, UnicodeDecodeError):
+        return  # truncated or rotated away meanwhile: keep what was read
+
+
+def iter_records(path=AUDIT_PATH, since=None, until=None, reason=None):
+    """Yield session records oldest first, one line in memory at a time.
+
+    A file left ``.rotating`` by a crash is read in its place in the order.
+    """
+    files = rotated_files(path)
+    for name in (rotating_path(path), path):
+        if os.path.exists(name):
+            files.append(name)
+    for name in files:
+        for line in _lines(name):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            if since is not None and record["end"] < since:
+                continue
+            if until is not None and record["start"] > until:
+                continue
+            if reason is not None and record["reason"] != reason:
+                continue
+            yield record
+
+
+def _parse_time(value):
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the lock session audit log.")
+    parser.add_argument("--path", default=AUDIT_PATH)
+    parser.add_argument("--since", type=_parse_time, metavar="ISODATE")
+    parser.add_argument("--until", type=_parse_time, metavar="ISODATE")
+    parser.add_argument("--reason", help="only sessions unlocked this way")
+    args = parser.parse_args(argv)
+    try:
+        for record in iter_records(args.path, args.since, args.until, args.reason):
+            sys.stdout.write(json.dumps(record) + "\n")
+    except BrokenPipeError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
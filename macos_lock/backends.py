@@ -0,0 +1,25 @@
+"""
+Locker backends by name. Imported lazily so the CLI only loads the one it
+uses (Quartz on macOS, Xlib on Linux).
+"""
+
+import sys
+
+BACKENDS = ("quartz", "x11")
+
+
+def default_backend():
+    return "quartz" if sys.platform == "darwin" else "x11"
+
+
+def load_backend(name):
+    """Return ``(locker_class, event_names)`` for a backend name."""
+    if name == "quartz":
+        from macos_lock import locker
+
+        return locker.InputLocker, locker.EVENT_NAMES
+    if name == "x11":
+        from macos_lock import x11
+
+        return x11.X11InputLocker, x11.EVENT_NAMES
+    raise ValueError(f"Unknown backend: {name!r}")
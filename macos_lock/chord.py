@@ -0,0 +1,212 @@
+"""
+Backend-independent lock state and unlock-chord matching.
+
+Backends (the Quartz event tap, X11 grabs) subclass :class:`ChordLocker`
+and feed it raw keycodes with the event's own timestamp in nanoseconds.
+Matching never reads a clock or starts a timer, so replaying a recorded
+trace always gives the same result.
+"""
+
+import threading
+
+from macos_lock.keymap import DEFAULT_UNLOCK_KEYCODES
+
+# A chord key whose last KeyDown (or repeat) is older than this is only
+# trusted if the backend can confirm it is still held.
+STALE_KEY_MS = 5000
+
+# Failed attempts: a bucket of ATTEMPT_BURST tokens refilled at one per
+# ATTEMPT_REFILL_MS, and not during a lockout. Running dry starts a lockout
+# of LOCKOUT_MS that doubles each time, up to LOCKOUT_MAX_MS. The refill is
+# far slower than anyone types, so pacing attempts to stay under it limits
+# an attacker to 60 attempts an hour.
+ATTEMPT_BURST = 5
+ATTEMPT_REFILL_MS = 60_000
+LOCKOUT_MS = 5000
+LOCKOUT_MAX_MS = 300_000
+
+NS_PER_MS = 1_000_000
+
+
+class ChordLocker:
+    """Pressed-key tracking and unlock matching shared by all backends.
+
+    With ``hold_ms`` the chord has to stay down that long: the match is
+    decided by the timestamp of a later event (key repeat or any other
+    input) while all chord keys are still held.
+
+    ``pressed_keys`` maps keycode -> timestamp of its last KeyDown. KeyUps
+    can be lost (sleep, secure input, a disabled tap), so before a chord
+    is accepted its keys older than ``stale_ns`` are checked with
+    :meth:`_hardware_key_down` and dropped if released.
+
+    The chord only matches when exactly its keys are down. A new non-chord
+    key pressed while another key is held, or a complete chord with extra
+    keys, is a failed attempt and costs a token from a fixed-size bucket;
+    an empty bucket starts a lockout during which the chord is ignored.
+
+    ``on_unlock`` is called exactly once per lock with the unlock reason.
+    ``listeners`` receive ``(kind, fields)`` lifecycle events.
+    """
+
+    hold_ns = 0
+    stale_ns = STALE_KEY_MS * NS_PER_MS
+    attempt_burst = ATTEMPT_BURST
+    attempt_refill_ns = ATTEMPT_REFILL_MS * NS_PER_MS
+    lockout_ns = LOCKOUT_MS * NS_PER_MS
+    lockout_max_ns = LOCKOUT_MAX_MS * NS_PER_MS
+
+    def __init__(self, unlock_keycodes=None, hold_ms=0, on_unlock=None):
+        self.locked = False
+        self.pressed_keys = {}
+        self.unlock_keycodes = frozenset(unlock_keycodes or DEFAULT_UNLOCK_KEYCODES)
+        self.hold_ns = int(hold_ms * 1_000_000)
+        self.chord_since = None
+        self.locked_out_until = 0
+        self._tokens = self.attempt_burst
+        self._tokens_at = None
+        self._lockouts = 0
+        self._last_failure = None
+        self.on_unlock = on_unlock
+        self.listeners = []
+        self._state_lock = threading.Lock()
+
+    def set_unlock_keycodes(self, keycodes):
+        self.unlock_keycodes = frozenset(keycodes)
+
+    def set_hold_ms(self, hold_ms):
+        self.hold_ns = int(hold_ms * 1_000_000)
+
+    def _notify(self, kind, **fields):
+        for listener in self.listeners:
+            listener(kind, fields)
+
+    # ---- matching (hot path) ----------------------------------------------
+    def key_down(self, keycode, timestamp):
+        """Record a KeyDown (or key repeat); True if the chord is satisfied."""
+        pressed = self.pressed_keys
+        new = keycode not in pressed
+        pressed[keycode] = timestamp
+        if not pressed.keys() >= self.unlock_keycodes:
+            if new and len(pressed) > 1 and keycode not in self.unlock_keycodes:
+                self.failed_attempt(timestamp)
+            return False
+        if self.chord_since is None:
+            # Chord newly complete: the only point where stamps are checked.
+            if not self._chord_fresh(timestamp):
+                return False
+            if len(pressed) != len(self.unlock_keycodes):
+                if new:
+                    self.failed_attempt(timestamp)  # chord plus extra keys
+                return False
+            if timestamp < self.locked_out_until:
+                return False
+            if not self.hold_ns:
+                return True
+            self.chord_since = timestamp
+            return False
+        if len(pressed) != len(self.unlock_keycodes):
+            # Extra key during the hold: a failed attempt, and the hold restarts.
+            if new:
+                self.failed_attempt(timestamp)
+            self.chord_since = None
+            return False
+        return (timestamp - self.chord_since >= self.hold_ns
+                and timestamp >= self.locked_out_until)
+
+    def key_up(self, keycode, timestamp):
+        self.pressed_keys.pop(keycode, None)
+        if keycode in self.unlock_keycodes:
+            self.chord_since = None
+
+    def hold_elapsed(self, timestamp):
+        """For non-key events while a hold is in progress."""
+        return (timestamp - self.chord_since >= self.hold_ns
+                and timestamp >= self.locked_out_until
+                and len(self.pressed_keys) == len(self.unlock_keycodes))
+
+    def reset_keys(self):
+        """Fresh key and attempt state for a new lock."""
+        self.pressed_keys.clear()
+        self.chord_since = None
+        self.locked_out_until = 0
+        self._tokens = self.attempt_burst
+        self._tokens_at = None
+        self._lockouts = 0
+        self._last_failure = None
+
+    # ---- failed attempts --------------------------------------------------
+    def failed_attempt(self, timestamp):
+        """Take a token; start (or extend) a lockout when none are left."""
+        if timestamp < self.locked_out_until:
+            return  # not counted, so waiting it out always works
+        if self._tokens_at is not None:
+            self._tokens = min(self.attempt_burst, self._tokens + (
+                timestamp - self._tokens_at) / self.attempt_refill_ns)
+        self._tokens_at = timestamp
+        if (self._last_failure is not None
+                and timestamp - self._last_failure > self.lockout_max_ns):
+            self._lockouts = 0  # quiet long enough: start over at LOCKOUT_MS
+        self._last_failure = timestamp
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return
+        duration = min(self.lockout_ns << min(self._lockouts, 32), self.lockout_max_ns)
+        self._lockouts += 1
+        # The quiet period that resets the back-off, and the refill, start
+        # when this ends.
+        self.locked_out_until = self._last_failure = timestamp + duration
+        self._tokens_at = self.locked_out_until
+        self.chord_since = None
+        self._notify("unlock_lockout", seconds=duration / 1e9, count=self._lockouts)
+
+    # ---- stale key reconciliation -----------------------------------------
+    def _chord_fresh(self, timestamp):
+        """Drop stale keys that are no longer held; True if the chord is intact.
+
+        Extra phantom keys are dropped too, so they cannot block the exact
+        match forever.
+        """
+        cutoff = timestamp - self.stale_ns
+        stale = [k for k, ts in self.pressed_keys.items()
+                 if ts < cutoff and not self._hardware_key_down(k)]
+        for keycode in stale:
+            del self.pressed_keys[keycode]
+        if stale:
+            self._notify("stale_keys", keycodes=sorted(stale), cause="expired")
+        return self.unlock_keycodes.isdisjoint(stale)
+
+    def resync_keys(self, cause):
+        """Drop every pressed key the hardware reports as released.
+
+        Called by backends after a gap in which KeyUps may have been lost.
+        """
+        stale = [k for k in self.pressed_keys if not self._hardware_key_down(k)]
+        for keycode in stale:
+            del self.pressed_keys[keycode]
+            if keycode in self.unlock_keycodes:
+                self.chord_since = None
+        if stale:
+            self._notify("stale_keys", keycodes=sorted(stale), cause=cause)
+        return stale
+
+    def _hardware_key_down(self, keycode):
+        """Backend hook: current physical key state. Without one, stale
+        keys are assumed released."""
+        return False
+
+    # ---- lock state -------------------------------------------------------
+    def unlock(self, reason="api"):
+        """Release the lock. Safe to call from any thread, more than once."""
+        with self._state_lock:
+            if not self.locked:
+                return False
+            self.locked = False
+            self._release()
+        self._notify("unlocked", reason=reason)
+        if self.on_unlock:
+            self.on_unlock(reason)
+        return True
+
+    def _release(self):
+        """Backend hook: drop the grab. Called with the state lock held."""
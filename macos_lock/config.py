@@ -0,0 +1,195 @@
+"""
+Shared configuration (``~/.macos-lock-config.json``).
+
+Writes are atomic: the new content goes to a temp file that is fsynced and
+renamed over the config, so a crash leaves either the old or the new file.
+After each write a last-known-good copy (``.bak``) is refreshed the same
+way; :func:`load_config` falls back to it, with a warning, when the config
+is unreadable. :class:`ConfigWriter` coalesces rapid successive saves.
+
+``json`` is imported on first use: it drags in ``re`` and is the largest
+part of the CLI's import time when no config file exists.
+"""
+
+import os
+import threading
+import time
+import warnings
+
+from macos_lock.keylayout import keys_to_keycodes
+from macos_lock.keymap import DEFAULT_UNLOCK_KEYCODES, DEFAULT_UNLOCK_KEYS
+
+CONFIG_PATH = os.path.expanduser("~/.macos-lock-config.json")
+
+DEFAULT_CONFIG = {
+    "unlock_keys": list(DEFAULT_UNLOCK_KEYS),
+    "unlock_hold_ms": 0,
+    "audit_log": False,
+    "show_overlay": False,
+    "passthrough_apps": [],
+}
+
+# Serializes writers in this process; the rename makes each write atomic.
+_write_lock = threading.Lock()
+
+
+def _defaults():
+    return {k: list(v) if isinstance(v, list) else v for k, v in DEFAULT_CONFIG.items()}
+
+
+def backup_path(path):
+    return path + ".bak"
+
+
+def _read(path):
+    import json
+
+    with open(path, "r") as f:
+        saved = json.load(f)
+    if not isinstance(saved, dict):
+        raise ValueError("config is not a JSON object")
+    return saved
+
+
+def load_config():
+    cfg = _defaults()
+    path = CONFIG_PATH
+    if os.path.exists(path):
+        try:
+            cfg.update(_read(path))
+            return cfg
+        except (ValueError, IOError) as exc:
+            error = exc
+        try:
+            cfg.update(_read(backup_path(path)))
+            warnings.warn(f"{path} is unreadable ({error}); "
+                          f"using the last-known-good copy", RuntimeWarning)
+        except (ValueError, IOError):
+            warnings.warn(f"{path} is unreadable ({error}) and has no usable "
+                          f"backup; using the default unlock keys", RuntimeWarning)
+    return cfg
+
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _fsync_dir(path):
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_config(config, path=None):
+    """Atomically replace the config file, then refresh the backup."""
+    import json
+
+    path = path or CONFIG_PATH
+    data = json.dumps(config, indent=2)
+    with _write_lock:
+        _write_atomic(path, data)
+        _fsync_dir(path)
+        _write_atomic(backup_path(path), data)
+        _fsync_dir(path)
+
+
+class ConfigWriter:
+    """Background writer that coalesces saves.
+
+    :meth:`submit` only stores a snapshot; the writer thread saves the most
+    recent one once no new snapshot arrived for ``delay`` seconds (and at
+    the latest ``max_delay`` after the first unsaved one).
+    """
+
+    def __init__(self, path=None, delay=0.5, max_delay=5.0):
+        self.path = path
+        self.delay = delay
+        self.max_delay = max_delay
+        self.submitted = 0
+        self.writes = 0
+        self._pending = None
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    def submit(self, config):
+        snapshot = {k: list(v) if isinstance(v, list) else v for k, v in config.items()}
+        with self._cond:
+            self._pending = snapshot
+            self.submitted += 1
+            self._cond.notify()
+
+    def flush(self):
+        """Write the pending snapshot now, on the calling thread."""
+        with self._cond:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self._save(pending)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="macos-lock-config", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return  # stop() flushes what is left
+                self._wait_quiet()
+                pending, self._pending = self._pending, None
+            if pending is not None:
+                self._save(pending)
+
+    def _wait_quiet(self):
+        """Wait (condition held) until no submit for ``delay`` or ``max_delay``."""
+        deadline = time.monotonic() + self.max_delay
+        while not self._stop:
+            seen = self.submitted
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._cond.wait(min(self.delay, remaining))
+            if self.submitted == seen:
+                return
+
+    def _save(self, config):
+        save_config(config, self.path)
+        self.writes += 1
+
+
+def unlock_keycodes(config):
+    """Keycodes of the configured chord, or X + C if it does not resolve.
+
+    Any name missing from the active layout falls back to the whole default
+    chord, never to the keys that did resolve.
+    """
+    keys = config.get("unlock_keys", ())
+    keycodes = keys_to_keycodes(keys)
+    if not keycodes:
+        if keys:
+            warnings.warn(f"unlock keys {list(keys)} do not all exist on the "
+                          f"active keyboard layout; using the default unlock keys",
+                          RuntimeWarning)
+        return list(DEFAULT_UNLOCK_KEYCODES)
+    return keycodes
@@ -0,0 +1,133 @@
+"""
+Streaming JSON-lines event output.
+
+Records are queued from the event-tap thread with a single deque append and
+written in batches by a background thread, so a slow reader (or a FIFO with
+no reader yet) can never back-pressure the tap. Blocked input is not queued
+per event at all: the locker only bumps a counter and the writer turns the
+counter deltas into periodic ``blocked_summary`` records.
+"""
+
+import collections
+import json
+import sys
+import threading
+import time
+
+MAX_PENDING = 4096
+
+
+class EventStream:
+    """Writes ``{"event": ..., "ts": ...}`` lines to stdout or a file/FIFO.
+
+    ``target`` is ``"-"`` for stdout, a path, or an already open text stream
+    (which is flushed but not closed).
+
+    ``counts`` is the locker's blocked-event counter dict (event type ->
+    count); ``type_names`` maps event types to the names used in summaries.
+    """
+
+    def __init__(self, target="-", counts=None, type_names=None,
+                 flush_interval=0.1, summary_interval=1.0, max_pending=MAX_PENDING):
+        self.target = target
+        self.counts = counts if counts is not None else {}
+        self.type_names = type_names or {}
+        self.flush_interval = flush_interval
+        self.summary_interval = summary_interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self._pending = collections.deque(maxlen=max_pending)
+        self._last_counts = {}
+        self._last_summary = time.monotonic()
+        self._stream = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- producer side (any thread, never blocks) -------------------------
+    def emit(self, kind, **fields):
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+        fields["event"] = kind
+        fields["ts"] = time.time()
+        self._pending.append(fields)
+
+    def listener(self, kind, fields):
+        """Locker listener adapter."""
+        self.emit(kind, **fields)
+
+    # ---- writer thread ----------------------------------------------------
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="macos-lock-events", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            self._stream = self._open()
+            while not self._stop.wait(self.flush_interval):
+                self._flush()
+            self._flush(final=True)
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            if self._stream is not None and isinstance(self.target, str) \
+                    and self.target != "-":
+                try:
+                    self._stream.close()
+                except OSError:
+                    pass
+
+    def _open(self):
+        if not isinstance(self.target, str):
+            return self.target
+        if self.target == "-":
+            return sys.stdout
+        # Opening a FIFO blocks until a reader appears - which is why this
+        # happens on the writer thread.
+        return open(self.target, "w", buffering=1 << 16)
+
+    def _flush(self, final=False):
+        now = time.monotonic()
+        if final or now - self._last_summary >= self.summary_interval:
+            self._summarize(now)
+
+        pending = self._pending
+        if not pending:
+            return
+        lines = []
+        while pending:
+            try:
+                lines.append(json.dumps(pending.popleft(), separators=(",", ":")))
+            except IndexError:
+                break
+        self._stream.write("\n".join(lines) + "\n")
+        self._stream.flush()
+        self.written += len(lines)
+        self.batches += 1
+
+    def _summarize(self, now):
+        interval = now - self._last_summary
+        self._last_summary = now
+        snapshot = dict(self.counts)
+        delta = {}
+        for event_type, count in snapshot.items():
+            diff = count - self._last_counts.get(event_type, 0)
+            if diff:
+                delta[self.type_names.get(event_type, str(event_type))] = diff
+        self._last_counts = snapshot
+        if delta:
+            self.emit(
+                "blocked_summary",
+                interval=round(interval, 3),
+                total=sum(delta.values()),
+                blocked=delta,
+            )
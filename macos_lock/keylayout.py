@@ -0,0 +1,242 @@
+"""
+Keycode table for the active keyboard layout.
+
+Character keys are named after what they type on the current layout (so
+the key labelled ``Z`` on a German keyboard is ``"z"``), everything else
+(function, arrow, keypad keys) gets a fixed name. The table is generated
+once per layout and cached in ``~/.macos-lock/keylayout.json`` keyed by
+the layout identifier; later starts only read the identifier and load the
+cached entry.
+
+A layout provider has two methods: ``layout_id()`` and
+``character(keycode)`` (the unshifted character or None). Without one
+(Linux, tests) the character keys come from the US-ANSI table in
+:mod:`macos_lock.keymap`.
+"""
+
+import os
+import sys
+
+from macos_lock import keymap
+
+CACHE_PATH = os.path.expanduser("~/.macos-lock/keylayout.json")
+CACHE_VERSION = 1
+
+TABLE_SIZE = 128
+
+# Keys whose name does not depend on the layout (macOS virtual keycodes).
+FIXED_KEYS = {
+    36: "return", 48: "tab", 49: "space", 51: "delete", 53: "escape",
+    76: "kp_enter", 71: "kp_clear", 65: "kp_decimal", 67: "kp_multiply",
+    69: "kp_plus", 75: "kp_divide", 78: "kp_minus", 81: "kp_equals",
+    82: "kp_0", 83: "kp_1", 84: "kp_2", 85: "kp_3", 86: "kp_4",
+    87: "kp_5", 88: "kp_6", 89: "kp_7", 91: "kp_8", 92: "kp_9",
+    122: "f1", 120: "f2", 99: "f3", 118: "f4", 96: "f5", 97: "f6",
+    98: "f7", 100: "f8", 101: "f9", 109: "f10", 103: "f11", 111: "f12",
+    105: "f13", 107: "f14", 113: "f15", 106: "f16", 64: "f17", 79: "f18",
+    80: "f19", 90: "f20",
+    114: "help", 115: "home", 116: "page_up", 117: "forward_delete",
+    119: "end", 121: "page_down",
+    123: "left", 124: "right", 125: "down", 126: "up",
+}
+
+# Keys that type a character: the ANSI block, ISO section key, JIS extras.
+CHARACTER_KEYCODES = tuple(
+    k for k in list(range(51)) + [93, 94] if k not in FIXED_KEYS
+)
+
+INPUT_SOURCE_CHANGED = "com.apple.Carbon.TISNotifySelectedKeyboardInputSourceChanged"
+CF_STRING_ENCODING_UTF8 = 0x08000100
+
+
+def generate(provider):
+    """Build the name table (tuple indexed by keycode) from a provider."""
+    names = [None] * TABLE_SIZE
+    for keycode, name in FIXED_KEYS.items():
+        names[keycode] = name
+    seen = set(FIXED_KEYS.values())
+    for keycode in CHARACTER_KEYCODES:
+        char = provider.character(keycode)
+        name = char.lower() if char and len(char) == 1 and char.isprintable() else None
+        if not name or name.isspace() or name in seen:
+            # Dead keys and duplicates keep a stable, unambiguous name.
+            name = f"key_{keycode}"
+        seen.add(name)
+        names[keycode] = name
+    return tuple(names)
+
+
+class KeyLayout:
+    """Name <-> keycode table for one provider, loaded lazily.
+
+    :meth:`invalidate` drops the in-memory table; the next lookup reads the
+    layout identifier again and loads (or generates) the matching table.
+    """
+
+    def __init__(self, provider=None, cache_path=None):
+        self.provider = provider
+        self.cache_path = cache_path or CACHE_PATH
+        self.layout_id = None
+        self._names = None
+        self._map = None
+
+    # ---- lookups ----------------------------------------------------------
+    def names(self):
+        if self._names is None:
+            self._load()
+        return self._names
+
+    def keycode_map(self):
+        if self._map is None:
+            self._map = {name: code for code, name in enumerate(self.names()) if name}
+        return self._map
+
+    def keycode_name(self, keycode):
+        names = self.names()
+        if 0 <= keycode < len(names):
+            return names[keycode]
+        return None
+
+    def keys_to_keycodes(self, keys):
+        """Keycodes of ``keys``, or ``[]`` unless every name resolves.
+
+        A chord saved on another layout may name keys this one lacks;
+        dropping them would shrink the chord, so nothing is returned.
+        """
+        keycode_map = self.keycode_map()
+        keycodes = [keycode_map.get(k) for k in keys]
+        if None in keycodes or len(set(keycodes)) != len(keycodes):
+            return []
+        return keycodes
+
+    def invalidate(self, *args):
+        self.layout_id = None
+        self._names = None
+        self._map = None
+
+    # ---- cache ------------------------------------------------------------
+    def _load(self):
+        if self.provider is None:
+            self._names = generate(UsAnsiProvider())
+            return
+        self.layout_id = self.provider.layout_id()
+        if self.layout_id is None:
+            # No identifier to key the cache by: generate, do not store.
+            self._names = generate(self.provider)
+            return
+        layouts = self._read_cache()
+        names = layouts.get(self.layout_id)
+        if names is None or len(names) != TABLE_SIZE:
+            names = generate(self.provider)
+            layouts[self.layout_id] = list(names)
+            self._write_cache(layouts)
+        self._names = tuple(names)
+
+    def _read_cache(self):
+        import json
+
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+        except (ValueError, OSError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("layouts", {})
+
+    def _write_cache(self, layouts):
+        import json
+
+        tmp = self.cache_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump({"version": CACHE_VERSION, "layouts": layouts}, f)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass  # the table still works, it is just regenerated next start
+
+    # ---- input source changes --------------------------------------------
+    def watch(self):
+        """Invalidate when the user switches input source (macOS only)."""
+        try:
+            from Foundation import NSDistributedNotificationCenter
+        except ImportError:
+            return None
+        center = NSDistributedNotificationCenter.defaultCenter()
+        return center.addObserverForName_object_queue_usingBlock_(
+            INPUT_SOURCE_CHANGED, None, None, self.invalidate
+        )
+
+
+class UsAnsiProvider:
+    """The built-in US-ANSI table."""
+
+    def layout_id(self):
+        return "us-ansi"
+
+    def character(self, keycode):
+        return keymap.keycode_name(keycode)
+
+
+class MacLayoutProvider:
+    """Reads the active layout through Text Input Sources and Quartz."""
+
+    def layout_id(self):
+        """ID of the current keyboard layout input source, or None.
+
+        Asked of the Text Input Sources API, which is current as soon as
+        the change notification fires; HIToolbox's preference may lag.
+        """
+        import ctypes
+        import ctypes.util
+
+        carbon = ctypes.cdll.LoadLibrary(ctypes.util.find_library("Carbon"))
+        cf = ctypes.cdll.LoadLibrary(ctypes.util.find_library("CoreFoundation"))
+        carbon.TISCopyCurrentKeyboardLayoutInputSource.restype = ctypes.c_void_p
+        carbon.TISGetInputSourceProperty.restype = ctypes.c_void_p
+        carbon.TISGetInputSourceProperty.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        cf.CFStringGetCString.argtypes = [ctypes.c_void_p, ctypes.c_char_p,
+                                          ctypes.c_long, ctypes.c_uint32]
+        cf.CFRelease.argtypes = [ctypes.c_void_p]
+
+        source = carbon.TISCopyCurrentKeyboardLayoutInputSource()
+        if not source:
+            return None
+        try:
+            key = ctypes.c_void_p.in_dll(carbon, "kTISPropertyInputSourceID")
+            value = carbon.TISGetInputSourceProperty(source, key)
+            buf = ctypes.create_string_buffer(256)
+            if not value or not cf.CFStringGetCString(value, buf, len(buf),
+                                                      CF_STRING_ENCODING_UTF8):
+                return None
+            return buf.value.decode("utf-8")
+        finally:
+            cf.CFRelease(source)
+
+    def character(self, keycode):
+        import Quartz
+
+        event = Quartz.CGEventCreateKeyboardEvent(None, keycode, True)
+        Quartz.CGEventSetFlags(event, 0)
+        length, chars = Quartz.CGEventKeyboardGetUnicodeString(event, 4, None, None)
+        return chars[:length] if length else None
+
+
+_current = None
+
+
+def current_layout():
+    """Process-wide :class:`KeyLayout` for the active keyboard layout."""
+    global _current
+    if _current is None:
+        _current = KeyLayout(MacLayoutProvider() if sys.platform == "darwin" else None)
+    return _current
+
+
+def keycode_name(keycode):
+    return current_layout().keycode_name(keycode)
+
+
+def keys_to_keycodes(keys):
+    return current_layout().keys_to_keycodes(keys)
@@ -0,0 +1,27 @@
+"""
+US-ANSI keycode table.
+
+``KEYCODE_NAMES`` is indexed by the macOS virtual keycode, so the reverse
+lookup (keycode -> name) is a single tuple index.
+"""
+
+KEYCODE_NAMES = (
+    "a", "s", "d", "f", "h", "g", "z", "x",             # 0-7
+    "c", "v", None, "b", "q", "w", "e", "r",            # 8-15
+    "y", "t", "1", "2", "3", "4", "6", "5",             # 16-23
+    "=", "9", "7", "-", "8", "0", "]", "o",             # 24-31
+    "u", "[", "i", "p", "return", "l", "j", "'",        # 32-39
+    "k", ";", "\\", ",", "/", "n", "m", ".",            # 40-47
+    "tab", "space", "`", "delete", None, "escape",      # 48-53
+)
+
+KEYCODE_MAP = {name: code for code, name in enumerate(KEYCODE_NAMES) if name}
+
+DEFAULT_UNLOCK_KEYS = ("x", "c")
+DEFAULT_UNLOCK_KEYCODES = (7, 8)
+
+
+def keycode_name(keycode):
+    if 0 <= keycode < len(KEYCODE_NAMES):
+        return KEYCODE_NAMES[keycode]
+    return None
@@ -0,0 +1,264 @@
+"""
+Input locker engine (Quartz Event Tap), shared by the CLI, the GUI and the
+programmatic API. Qt-free.
+"""
+
+import threading
+
+import Quartz
+
+from macos_lock.chord import ChordLocker
+from macos_lock.config import unlock_keycodes
+from macos_lock.passthrough import pid_index
+
+KEYBOARD_EVENTS = (
+    Quartz.kCGEventKeyDown,
+    Quartz.kCGEventKeyUp,
+)
+
+POINTER_EVENTS = (
+    Quartz.kCGEventLeftMouseDown,
+    Quartz.kCGEventLeftMouseUp,
+    Quartz.kCGEventRightMouseDown,
+    Quartz.kCGEventRightMouseUp,
+    Quartz.kCGEventMouseMoved,
+    Quartz.kCGEventLeftMouseDragged,
+    Quartz.kCGEventRightMouseDragged,
+    Quartz.kCGEventScrollWheel,
+    Quartz.kCGEventOtherMouseDown,
+    Quartz.kCGEventOtherMouseUp,
+    Quartz.kCGEventOtherMouseDragged,
+    Quartz.kCGEventTabletPointer,
+    Quartz.kCGEventTabletProximity,
+)
+
+EVENT_NAMES = {
+    Quartz.kCGEventKeyDown: "key_down",
+    Quartz.kCGEventKeyUp: "key_up",
+    Quartz.kCGEventLeftMouseDown: "left_mouse_down",
+    Quartz.kCGEventLeftMouseUp: "left_mouse_up",
+    Quartz.kCGEventRightMouseDown: "right_mouse_down",
+    Quartz.kCGEventRightMouseUp: "right_mouse_up",
+    Quartz.kCGEventMouseMoved: "mouse_moved",
+    Quartz.kCGEventLeftMouseDragged: "left_mouse_dragged",
+    Quartz.kCGEventRightMouseDragged: "right_mouse_dragged",
+    Quartz.kCGEventScrollWheel: "scroll_wheel",
+    Quartz.kCGEventOtherMouseDown: "other_mouse_down",
+    Quartz.kCGEventOtherMouseUp: "other_mouse_up",
+    Quartz.kCGEventOtherMouseDragged: "other_mouse_dragged",
+    Quartz.kCGEventTabletPointer: "tablet_pointer",
+    Quartz.kCGEventTabletProximity: "tablet_proximity",
+}
+
+TAP_DISABLED_EVENTS = (
+    Quartz.kCGEventTapDisabledByTimeout,
+    Quartz.kCGEventTapDisabledByUserInput,
+)
+
+# Which event types a lock profile swallows. Key events are always part of
+# the mask so the unlock chord can be observed.
+PROFILES = {
+    "full": KEYBOARD_EVENTS + POINTER_EVENTS,
+    "keyboard-only": KEYBOARD_EVENTS,
+}
+
+
+def event_mask_for(profile):
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown lock profile: {profile!r}")
+    mask = 0
+    for event_type in PROFILES[profile]:
+        mask |= 1 << event_type
+    return mask
+
+
+class InputLocker(ChordLocker):
+    """Blocks input with a Quartz event tap while ``locked``.
+
+    ``run()`` holds the lock on the calling thread (CLI); ``lock()`` starts
+    a background run-loop thread (GUI, API). Listeners receive
+    ``lock_started``, ``unlock_matched``, ``unlocked``, ``tap_reenabled``,
+    ``stale_keys`` and ``unlock_lockout``.
+
+    Events posted by the apps in ``passthrough_apps`` (bundle IDs) are let
+    through while locked; see :mod:`macos_lock.passthrough`.
+    """
+
+    event_names = EVENT_NAMES
+
+    def __init__(self, unlock_keycodes=None, profile="full", on_unlock=None,
+                 hold_ms=0, passthrough_apps=()):
+        super().__init__(unlock_keycodes, hold_ms=hold_ms, on_unlock=on_unlock)
+        self.tap = None
+        self.run_loop = None
+        self.run_loop_source = None
+        self.lock_thread = None
+        self.event_mask = event_mask_for(profile)
+        # Pre-seeded so the callback only ever increments existing keys.
+        self.blocked_counts = dict.fromkeys(EVENT_NAMES, 0)
+        self._started = threading.Event()
+        self._wake_observer = None
+        # None unless an allowlist is configured: the callback skips the check.
+        self.passthrough = pid_index(passthrough_apps)
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        kwargs.setdefault("unlock_keycodes", unlock_keycodes(config))
+        kwargs.setdefault("hold_ms", config.get("unlock_hold_ms", 0))
+        kwargs.setdefault("passthrough_apps", config.get("passthrough_apps", ()))
+        return cls(**kwargs)
+
+    # ---- event tap callback (hot path) ------------------------------------
+    def event_callback(self, proxy, event_type, event, refcon):
+        if not self.locked:
+            return event
+        passthrough = self.passthrough
+        if (passthrough is not None and event_type not in TAP_DISABLED_EVENTS
+                and Quartz.CGEventGetIntegerValueField(
+                    event, Quartz.kCGEventSourceUnixProcessID) in passthrough.pids):
+            return event  # injected by an allowed app, e.g. remote support
+
+        if event_type == Quartz.kCGEventKeyDown:
+            # Only a KeyDown (including key repeat) can complete the chord.
+            if self.key_down(
+                Quartz.CGEventGetIntegerValueField(event, Quartz.kCGKeyboardEventKeycode),
+                Quartz.CGEventGetTimestamp(event),
+            ):
+                return self._chord_unlock(event)
+        elif event_type == Quartz.kCGEventKeyUp:
+            self.key_up(
+                Quartz.CGEventGetIntegerValueField(event, Quartz.kCGKeyboardEventKeycode),
+                Quartz.CGEventGetTimestamp(event),
+            )
+        elif event_type in TAP_DISABLED_EVENTS:
+            # macOS disables slow taps; without this input would leak through.
+            Quartz.CGEventTapEnable(self.tap, True)
+            self._notify("tap_reenabled", cause=event_type)
+            # KeyUps that arrived while the tap was off never reached us.
+            self.resync_keys("tap_reenabled")
+            return event
+        elif self.chord_since is not None and self.hold_elapsed(
+            Quartz.CGEventGetTimestamp(event)
+        ):
+            # The hold completed; this (non-key) event itself stays blocked.
+            self._chord_unlock(None)
+
+        self.blocked_counts[event_type] += 1
+        return None
+
+    def _chord_unlock(self, event):
+        self._notify("unlock_matched", reason="chord")
+        self.unlock("chord")
+        return event
+
+    def _hardware_key_down(self, keycode):
+        return bool(Quartz.CGEventSourceKeyState(
+            Quartz.kCGEventSourceStateHIDSystemState, keycode
+        ))
+
+    # ---- sleep / wake -----------------------------------------------------
+    def _watch_wake(self):
+        """Resync pressed keys on the tap thread after the system wakes."""
+        try:
+            from AppKit import NSWorkspace, NSWorkspaceDidWakeNotification
+        except ImportError:  # pragma: no cover - pyobjc-framework-Cocoa missing
+            return
+        run_loop = self.run_loop
+
+        def on_wake(notification):
+            Quartz.CFRunLoopPerformBlock(run_loop, Quartz.kCFRunLoopCommonModes,
+                                         lambda: self.resync_keys("wake"))
+            Quartz.CFRunLoopWakeUp(run_loop)
+
+        center = NSWorkspace.sharedWorkspace().notificationCenter()
+        self._wake_observer = center.addObserverForName_object_queue_usingBlock_(
+            NSWorkspaceDidWakeNotification, None, None, on_wake
+        )
+
+    def _unwatch_wake(self):
+        if self._wake_observer is not None:
+            from AppKit import NSWorkspace
+
+            NSWorkspace.sharedWorkspace().notificationCenter().removeObserver_(
+                self._wake_observer
+            )
+            self._wake_observer = None
+
+    # ---- lock / unlock ----------------------------------------------------
+    def _create_tap(self):
+        self.reset_keys()
+        self.tap = Quartz.CGEventTapCreate(
+            Quartz.kCGSessionEventTap,
+            Quartz.kCGHeadInsertEventTap,
+            Quartz.kCGEventTapOptionDefault,
+            self.event_mask,
+            self.event_callback,
+            None,
+        )
+        if not self.tap:
+            return False
+        self.run_loop_source = Quartz.CFMachPortCreateRunLoopSource(
+            Quartz.kCFAllocatorDefault, self.tap, 0
+        )
+        return True
+
+    def lock(self):
+        """Install the event tap and start the run loop thread.
+
+        Returns False if the tap could not be created (missing
+        Accessibility permission).
+        """
+        with self._state_lock:
+            if self.locked:
+                return True
+            if not self._create_tap():
+                return False
+            self.locked = True
+            self._started.clear()
+            self.lock_thread = threading.Thread(
+                target=self._run_loop, name="macos-lock-tap", daemon=True
+            )
+            self.lock_thread.start()
+        self._started.wait(1.0)
+        return True
+
+    def run(self):
+        """Lock and run the event tap on the calling thread until unlocked.
+
+        Returns False if the tap could not be created.
+        """
+        with self._state_lock:
+            if not self._create_tap():
+                return False
+            self.locked = True
+            self._started.clear()
+        self._run_loop()
+        return True
+
+    def _run_loop(self):
+        self.run_loop = Quartz.CFRunLoopGetCurrent()
+        Quartz.CFRunLoopAddSource(
+            self.run_loop,
+            self.run_loop_source,
+            Quartz.kCFRunLoopCommonModes,
+        )
+        if self.passthrough is not None:
+            # Watch first so no launch falls between the two.
+            self.passthrough.watch()
+            self.passthrough.refresh()
+        Quartz.CGEventTapEnable(self.tap, True)
+        self._started.set()
+        self._notify("lock_started", unlock_keycodes=sorted(self.unlock_keycodes))
+        self._watch_wake()
+        try:
+            Quartz.CFRunLoopRun()
+        finally:
+            self._unwatch_wake()
+            if self.passthrough is not None:
+                self.passthrough.unwatch()
+
+    def _release(self):
+        if self.tap:
+            Quartz.CGEventTapEnable(self.tap, False)
+        if self.run_loop is not None:
+            Quartz.CFRunLoopStop(self.run_loop)
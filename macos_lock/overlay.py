@@ -0,0 +1,189 @@
+"""
+Full-screen lock overlay, one window per attached display (GUI only).
+
+The static part (dimmed background, lock glyph, unlock hint) is rendered
+once per screen size and device pixel ratio into a cached pixmap. While
+locked only the small counter region is repainted, at most ``REFRESH_HZ``
+times a second and only when the blocked-input count changed. Overlays are
+created on first use and reused across locks.
+"""
+
+from PyQt6.QtCore import QRect, QRectF, Qt, QTimer
+from PyQt6.QtGui import QColor, QFont, QGuiApplication, QPainter, QPixmap
+from PyQt6.QtWidgets import QWidget
+
+REFRESH_HZ = 4
+
+BACKGROUND = QColor(12, 12, 14, 225)
+TEXT = QColor("#e0e0e0")
+MUTED = QColor("#8a8a8e")
+ACCENT = QColor("#ff3b30")
+
+COUNTER_WIDTH = 360
+COUNTER_HEIGHT = 44
+
+
+class LockOverlay(QWidget):
+    """Frameless, always-on-top window covering one screen."""
+
+    def __init__(self, screen, hint=""):
+        super().__init__(None, Qt.WindowType.FramelessWindowHint
+                         | Qt.WindowType.WindowStaysOnTopHint
+                         | Qt.WindowType.Tool)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.hint = hint
+        self.count = 0
+        self.renders = 0
+        self._background = None
+        self._background_key = None
+        self.place(screen)
+
+    def place(self, screen):
+        self.setScreen(screen)
+        self.setGeometry(screen.geometry())
+
+    def set_hint(self, hint):
+        if hint != self.hint:
+            self.hint = hint
+            self._background_key = None
+
+    def set_count(self, count):
+        if count != self.count:
+            self.count = count
+            self.update(self.counter_rect())
+
+    def counter_rect(self):
+        return QRect((self.width() - COUNTER_WIDTH) // 2, self.height() // 2 + 80,
+                     COUNTER_WIDTH, COUNTER_HEIGHT)
+
+    # ---- cached background ------------------------------------------------
+    def background(self):
+        dpr = self.devicePixelRatioF()
+        key = (self.width(), self.height(), dpr)
+        if key != self._background_key:
+            self._background = self._render_background(dpr)
+            self._background_key = key
+        return self._background
+
+    def background_bytes(self):
+        """Memory held by the cached pixmap (0 before the first paint)."""
+        if self._background is None:
+            return 0
+        pixmap = self._background
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def _render_background(self, dpr):
+        self.renders += 1
+        width, height = self.width(), self.height()
+        pixmap = QPixmap(round(width * dpr), round(height * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(BACKGROUND)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        centre = height // 2
+
+        painter.setFont(_font(72))
+        painter.setPen(TEXT)
+        painter.drawText(QRect(0, centre - 150, width, 100),
+                         Qt.AlignmentFlag.AlignCenter, "\U0001f512")
+        painter.setFont(_font(28, bold=True))
+        painter.setPen(ACCENT)
+        painter.drawText(QRect(0, centre - 40, width, 48),
+                         Qt.AlignmentFlag.AlignCenter, "Locked")
+        painter.setFont(_font(15))
+        painter.setPen(MUTED)
+        painter.drawText(QRect(0, centre + 16, width, 32),
+                         Qt.AlignmentFlag.AlignCenter, self.hint)
+        painter.end()
+        return pixmap
+
+    # ---- painting ---------------------------------------------------------
+    def paintEvent(self, event):
+        rect = event.rect()
+        background = self.background()
+        dpr = background.devicePixelRatio()
+        painter = QPainter(self)
+        # Replace rather than blend: the window itself is translucent.
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.drawPixmap(QRectF(rect), background,
+                           QRectF(rect.x() * dpr, rect.y() * dpr,
+                                  rect.width() * dpr, rect.height() * dpr))
+        counter = self.counter_rect()
+        if rect.intersects(counter):
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+            painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+            painter.setFont(_font(13))
+            painter.setPen(MUTED)
+            painter.drawText(counter, Qt.AlignmentFlag.AlignCenter,
+                             f"{self.count:,} inputs blocked")
+        painter.end()
+
+
+class OverlayManager:
+    """Shows a :class:`LockOverlay` on every screen while locked.
+
+    ``counts`` is the locker's blocked-event counter dict; the overlay shows
+    how many events were blocked since :meth:`show`.
+    """
+
+    def __init__(self, counts, refresh_hz=REFRESH_HZ):
+        self.counts = counts
+        self.overlays = {}
+        self.visible = False
+        self._base = 0
+        self._timer = QTimer()
+        self._timer.setInterval(1000 // refresh_hz)
+        self._timer.timeout.connect(self._tick)
+        app = QGuiApplication.instance()
+        app.screenAdded.connect(self._screen_added)
+        app.screenRemoved.connect(self._screen_removed)
+
+    def show(self, hint=""):
+        self.visible = True
+        self._base = sum(self.counts.values())
+        for screen in QGuiApplication.screens():
+            self._show_on(screen, hint)
+        self._timer.start()
+
+    def hide(self):
+        self.visible = False
+        self._timer.stop()
+        for overlay in self.overlays.values():
+            overlay.hide()
+
+    def _show_on(self, screen, hint):
+        overlay = self.overlays.get(screen)
+        if overlay is None:
+            overlay = self.overlays[screen] = LockOverlay(screen, hint)
+        else:
+            overlay.place(screen)
+            overlay.set_hint(hint)
+        overlay.count = 0
+        overlay.show()
+        overlay.raise_()
+
+    def _tick(self):
+        count = sum(self.counts.values()) - self._base
+        for overlay in self.overlays.values():
+            overlay.set_count(count)
+
+    def _screen_added(self, screen):
+        if self.visible:
+            hint = next(iter(self.overlays.values())).hint if self.overlays else ""
+            self._show_on(screen, hint)
+
+    def _screen_removed(self, screen):
+        overlay = self.overlays.pop(screen, None)
+        if overlay is not None:
+            overlay.hide()
+            overlay.deleteLater()
+
+
+def _font(point_size, bold=False):
+    font = QFont()
+    font.setPointSize(point_size)
+    font.setBold(bold)
+    return font
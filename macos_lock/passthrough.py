@@ -0,0 +1,107 @@
+"""
+Applications whose injected input passes through the lock.
+
+Remote-support and automation agents post their input as synthetic
+events, which carry the posting process in
+``kCGEventSourceUnixProcessID``. :class:`PidIndex` resolves the configured
+bundle IDs into the set of PIDs running them, so the tap callback only
+does one set lookup per event. The set is rebuilt when a lock starts and
+updated from NSWorkspace launch / terminate notifications while it is
+held, never from the callback.
+
+A process provider has one method, ``running()``, yielding
+``(pid, bundle_id)`` pairs. Without one (Linux, tests) nothing is running.
+NSWorkspace only lists processes started as applications, so input from
+launchd daemons (``screensharingd``, ``ARDAgent``) cannot be allowlisted.
+"""
+
+import sys
+
+
+class PidIndex:
+    """PIDs of the running processes of ``bundle_ids``.
+
+    ``pids`` is replaced, never mutated, so the tap thread can read it
+    while notifications update it on the main thread.
+    """
+
+    def __init__(self, bundle_ids, provider=None):
+        self.bundle_ids = frozenset(bundle_ids)
+        self.provider = provider
+        self.pids = frozenset()
+        self.refreshes = 0
+        self._observers = []
+
+    def refresh(self):
+        """Rebuild from all running processes."""
+        running = self.provider.running() if self.provider is not None else ()
+        self.pids = frozenset(pid for pid, bundle_id in running
+                              if bundle_id in self.bundle_ids)
+        self.refreshes += 1
+
+    def launched(self, pid, bundle_id):
+        if bundle_id in self.bundle_ids:
+            self.pids = self.pids | {pid}
+
+    def terminated(self, pid):
+        if pid in self.pids:
+            self.pids = self.pids - {pid}
+
+    # ---- notifications (macOS) --------------------------------------------
+    def watch(self):
+        """Follow app launches and exits; False without AppKit."""
+        try:
+            from AppKit import (
+                NSWorkspace,
+                NSWorkspaceApplicationKey,
+                NSWorkspaceDidLaunchApplicationNotification,
+                NSWorkspaceDidTerminateApplicationNotification,
+            )
+        except ImportError:
+            return False
+        center = NSWorkspace.sharedWorkspace().notificationCenter()
+
+        def app_of(notification):
+            return notification.userInfo()[NSWorkspaceApplicationKey]
+
+        def on_launch(notification):
+            app = app_of(notification)
+            self.launched(app.processIdentifier(), app.bundleIdentifier())
+
+        def on_terminate(notification):
+            self.terminated(app_of(notification).processIdentifier())
+
+        self._observers = [
+            center.addObserverForName_object_queue_usingBlock_(
+                NSWorkspaceDidLaunchApplicationNotification, None, None, on_launch),
+            center.addObserverForName_object_queue_usingBlock_(
+                NSWorkspaceDidTerminateApplicationNotification, None, None,
+                on_terminate),
+        ]
+        return True
+
+    def unwatch(self):
+        if self._observers:
+            from AppKit import NSWorkspace
+
+            center = NSWorkspace.sharedWorkspace().notificationCenter()
+            for observer in self._observers:
+                center.removeObserver_(observer)
+            self._observers = []
+
+
+class WorkspaceProvider:
+    """Running applications from NSWorkspace."""
+
+    def running(self):
+        from AppKit import NSWorkspace
+
+        for app in NSWorkspace.sharedWorkspace().runningApplications():
+            yield app.processIdentifier(), app.bundleIdentifier()
+
+
+def pid_index(bundle_ids):
+    """A :class:`PidIndex` for ``bundle_ids``, or None if there are none."""
+    if not bundle_ids:
+        return None
+    return PidIndex(bundle_ids, WorkspaceProvider() if sys.platform == "darwin" else None)
@@ -0,0 +1,202 @@
+"""
+On-demand sampling profiler for the lock threads.
+
+A background thread reads ``sys._current_frames()`` at ``rate_hz`` and
+counts the stacks of the event tap / grab thread and the main (Qt) thread.
+On stop the counts are written as collapsed stacks, one ``stack count``
+line each, ready for ``flamegraph.pl`` or speedscope. A busy thread is
+seen where it last released the GIL, so innermost frames are approximate.
+
+Nothing samples until the profiler is started: ``install()`` only parks a
+thread in ``sigwait`` for SIGUSR1 (first signal starts, second stops and
+writes) and starts right away when ``MACOS_LOCK_PROFILE`` is set::
+
+    MACOS_LOCK_PROFILE=/tmp/lock.folded ./macos-lock.py
+    kill -USR1 <pid>        # start; again to stop and write
+"""
+
+import collections
+import math
+import os
+import signal
+import sys
+import threading
+import time
+import warnings
+
+PROFILE_ENV = "MACOS_LOCK_PROFILE"
+RATE_ENV = "MACOS_LOCK_PROFILE_HZ"
+PROFILE_DIR = os.path.expanduser("~/.macos-lock/profiles")
+
+RATE_HZ = 100
+THREADS = ("macos-lock-tap", "macos-lock-x11", "MainThread")
+MAX_STACKS = 10_000
+MAX_DEPTH = 128
+
+
+class SamplingProfiler:
+    """Samples the named threads until :meth:`stop`.
+
+    ``samples`` maps collapsed stacks (``thread;outer;...;inner``) to
+    counts; once ``max_stacks`` distinct stacks exist new ones are counted
+    under ``thread;[truncated]`` so memory stays bounded.
+    """
+
+    def __init__(self, path=None, rate_hz=RATE_HZ, threads=THREADS,
+                 max_stacks=MAX_STACKS):
+        self.path = path
+        self.interval = 1.0 / rate_hz
+        self.threads = frozenset(threads)
+        self.max_stacks = max_stacks
+        self.samples = collections.Counter()
+        self.sample_count = 0
+        self.sample_time = 0.0
+        self.written = None
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="macos-lock-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop sampling; the sampler thread writes the output."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.written
+
+    def toggle(self):
+        # Runs on the signal thread: only flips state, no I/O here.
+        if self.running:
+            self._stop.set()
+        else:
+            self.start()
+
+    # ---- sampler thread ---------------------------------------------------
+    def _run(self):
+        self.samples.clear()
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter()
+            self.sample()
+            self.sample_time += time.perf_counter() - start
+        self.written = self.write()
+
+    def sample(self):
+        frames = sys._current_frames()
+        for thread in threading.enumerate():
+            if thread.name not in self.threads:
+                continue
+            frame = frames.get(thread.ident)
+            if frame is not None:
+                self._count(thread.name, frame)
+        self.sample_count += 1
+
+    def _count(self, thread_name, frame):
+        labels = self._labels
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = (f"{code.co_name} "
+                                        f"({os.path.basename(code.co_filename)}"
+                                        f":{code.co_firstlineno})")
+            stack.append(label)
+            frame = frame.f_back
+        stack.append(thread_name)
+        key = ";".join(reversed(stack))
+        if key not in self.samples and len(self.samples) >= self.max_stacks:
+            key = f"{thread_name};[truncated]"
+        self.samples[key] += 1
+
+    # ---- output -----------------------------------------------------------
+    def write(self):
+        path = self.path or os.path.join(
+            PROFILE_DIR, time.strftime(f"profile-{os.getpid()}-%Y%m%d-%H%M%S.folded")
+        )
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"macos-lock: profile written to {path}", file=sys.stderr)
+        return path
+
+
+def _rate(value):
+    """``MACOS_LOCK_PROFILE_HZ`` as a positive rate, else ``RATE_HZ``."""
+    if not value:
+        return RATE_HZ
+    try:
+        rate = float(value)
+    except ValueError:
+        rate = 0.0
+    if not (rate > 0 and math.isfinite(rate)):
+        warnings.warn(f"{RATE_ENV}={value!r} is not a positive number; "
+                      f"sampling at {RATE_HZ} Hz", RuntimeWarning)
+        return RATE_HZ
+    return rate
+
+
+# signum -> thread parked in sigwait; it toggles the installed profiler.
+_waiters = {}
+_installed = None
+
+
+def _wait_for(signum):
+    while True:
+        signal.sigwait({signum})
+        if _installed is not None:
+            _installed.toggle()
+
+
+def _arm(signum):
+    """Handle ``signum`` on a thread parked in ``sigwait``.
+
+    The CLI's main thread sleeps in ``CFRunLoopRun``, where a Python
+    handler would only run once the next input event reaches the callback.
+    The signal is blocked on the calling thread, and so in every thread it
+    starts later, which leaves it to the waiter: handled on arrival, no
+    wakeups while idle. A thread started earlier may still receive it; the
+    Python handler then forwards it to the waiter.
+    """
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signum})
+    waiter = _waiters.get(signum)
+    if waiter is None:
+        waiter = _waiters[signum] = threading.Thread(
+            target=_wait_for, args=(signum,), name="macos-lock-signals", daemon=True
+        )
+        waiter.start()
+    signal.signal(signum, lambda signum, frame: signal.pthread_kill(waiter.ident, signum))
+
+
+def install(environ=None, signum=signal.SIGUSR1):
+    """Arm the signal toggle; start now if ``MACOS_LOCK_PROFILE`` is set.
+
+    The variable's value is the output path (``1`` picks one under
+    ``~/.macos-lock/profiles``); ``MACOS_LOCK_PROFILE_HZ`` sets the rate.
+    Must be called from the main thread, before other threads are started.
+    """
+    global _installed
+    environ = os.environ if environ is None else environ
+    target = environ.get(PROFILE_ENV)
+    profiler = SamplingProfiler(
+        path=target if target not in (None, "", "1") else None,
+        rate_hz=_rate(environ.get(RATE_ENV)),
+    )
+    _installed = profiler
+    _arm(signum)
+    if target:
+        profiler.start()
+    return profiler
@@ -0,0 +1,263 @@
+"""
+X11 backend: keyboard and pointer grabs on the root window.
+
+Needs ``python-xlib`` (``pip install python-xlib``). Raw X keycodes are fed
+into the same :class:`~macos_lock.chord.ChordLocker` matching as the
+Quartz backend; the configured key names are resolved through the server's
+keyboard mapping when the lock starts.
+"""
+
+import os
+import select
+import threading
+import warnings
+
+from macos_lock.chord import ChordLocker
+from macos_lock.keymap import DEFAULT_UNLOCK_KEYS
+
+try:
+    from Xlib import X, XK, display as xdisplay
+except ImportError:  # pragma: no cover - optional dependency
+    X = XK = xdisplay = None
+
+# Core protocol event codes (Xlib.X), so the table exists without Xlib.
+KEY_PRESS = 2
+KEY_RELEASE = 3
+BUTTON_PRESS = 4
+BUTTON_RELEASE = 5
+MOTION_NOTIFY = 6
+
+EVENT_NAMES = {
+    KEY_PRESS: "key_down",
+    KEY_RELEASE: "key_up",
+    BUTTON_PRESS: "button_down",
+    BUTTON_RELEASE: "button_up",
+    MOTION_NOTIFY: "pointer_moved",
+}
+
+# Config key names that differ from X keysym names, including the fixed
+# names of macos_lock.keylayout (function, arrow, navigation, keypad keys).
+KEYSYM_NAMES = {
+    "space": "space", "return": "Return", "tab": "Tab", "escape": "Escape",
+    "delete": "BackSpace", "=": "equal", "-": "minus", "[": "bracketleft",
+    "]": "bracketright", "'": "apostrophe", ";": "semicolon",
+    "\\": "backslash", ",": "comma", "/": "slash", ".": "period",
+    "`": "grave",
+    "left": "Left", "right": "Right", "up": "Up", "down": "Down",
+    "home": "Home", "end": "End", "page_up": "Prior", "page_down": "Next",
+    "forward_delete": "Delete", "help": "Help",
+    "kp_enter": "KP_Enter", "kp_clear": "Clear", "kp_decimal": "KP_Decimal",
+    "kp_multiply": "KP_Multiply", "kp_plus": "KP_Add", "kp_divide": "KP_Divide",
+    "kp_minus": "KP_Subtract", "kp_equals": "KP_Equal",
+    **{f"f{n}": f"F{n}" for n in range(1, 21)},
+    **{f"kp_{n}": f"KP_{n}" for n in range(10)},
+}
+
+PROFILES = ("full", "keyboard-only")
+
+# Xlib.X.ButtonPressMask | ButtonReleaseMask | PointerMotionMask
+POINTER_EVENT_MASK = (1 << 2) | (1 << 3) | (1 << 6)
+
+# X server timestamps are milliseconds.
+NS_PER_X_TIME = 1_000_000
+
+
+def _keysym(name):
+    keysym = XK.string_to_keysym(KEYSYM_NAMES.get(name, name))
+    if not keysym and len(name) == 1 and ord(name) >= 0xA0:
+        # Layout characters ("ö", "ß"): Latin-1 keysyms equal the code
+        # point, others use the Unicode keysym range.
+        keysym = ord(name) if ord(name) <= 0xFF else 0x01000000 | ord(name)
+    return keysym
+
+
+class X11Error(RuntimeError):
+    """Raised when Xlib is missing or the display cannot be opened."""
+
+
+class X11InputLocker(ChordLocker):
+    """Grabs keyboard (and pointer) until the unlock chord is pressed.
+
+    Same interface as the Quartz ``InputLocker``: ``run()`` blocks the
+    calling thread, ``lock()`` runs the event loop on a background thread
+    and ``unlock()`` may be called from any thread.
+    """
+
+    event_names = EVENT_NAMES
+
+    def __init__(self, unlock_keycodes=None, profile="full", on_unlock=None,
+                 hold_ms=0, unlock_keys=None, display_name=None):
+        super().__init__(unlock_keycodes, hold_ms=hold_ms, on_unlock=on_unlock)
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown lock profile: {profile!r}")
+        self.grab_pointer = profile == "full"
+        # Names are resolved against the server's keymap in lock()/run().
+        self.unlock_keys = list(unlock_keys) if unlock_keys else None
+        self.display_name = display_name
+        self.display = None
+        self.lock_thread = None
+        self.blocked_counts = dict.fromkeys(EVENT_NAMES, 0)
+        self._wake_r = self._wake_w = None
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        if not kwargs.get("unlock_keycodes"):
+            # Config names are resolved against the server's keymap.
+            kwargs.setdefault("unlock_keys", config.get("unlock_keys"))
+        kwargs.setdefault("hold_ms", config.get("unlock_hold_ms", 0))
+        return cls(**kwargs)
+
+    # ---- keymap -----------------------------------------------------------
+    def resolve_keys(self, names):
+        """Config key names -> X keycodes, or ``[]`` unless every name resolves."""
+        keycodes = []
+        for name in names:
+            keysym = _keysym(name)
+            keycode = self.display.keysym_to_keycode(keysym) if keysym else 0
+            if not keycode or keycode in keycodes:
+                # A partial chord would unlock on fewer keys than configured.
+                return []
+            keycodes.append(keycode)
+        return keycodes
+
+    # ---- event handling ---------------------------------------------------
+    def handle_event(self, event, next_event=None):
+        """Process one X event. ``next_event`` returns a queued event or None.
+
+        Without XKB detectable auto-repeat a held key arrives as
+        Release/Press pairs with the same timestamp; those are folded into a
+        single repeat KeyDown so holds are not reset.
+        """
+        event_type = event.type
+        if event_type == KEY_PRESS:
+            if self.key_down(event.detail, event.time * NS_PER_X_TIME):
+                self._notify("unlock_matched", reason="chord")
+                self.unlock("chord")
+                return
+        elif event_type == KEY_RELEASE:
+            following = next_event() if next_event is not None else None
+            if (following is not None and following.type == KEY_PRESS
+                    and following.detail == event.detail
+                    and following.time == event.time):
+                self.handle_event(following)
+                return
+            self.key_up(event.detail, event.time * NS_PER_X_TIME)
+            if following is not None:
+                self.blocked_counts[event_type] += 1
+                self.handle_event(following, next_event)
+                return
+        elif event_type in EVENT_NAMES:
+            if self.chord_since is not None and self.hold_elapsed(
+                event.time * NS_PER_X_TIME
+            ):
+                self._notify("unlock_matched", reason="chord")
+                self.unlock("chord")
+        else:
+            return
+        self.blocked_counts[event_type] += 1
+
+    def _hardware_key_down(self, keycode):
+        # Called on the loop thread, which owns the connection.
+        if self.display is None:
+            return False
+        keymap = self.display.query_keymap()
+        return bool(keymap[keycode >> 3] & (1 << (keycode & 7)))
+
+    def _queued_event(self):
+        if self.display.pending_events():
+            return self.display.next_event()
+        return None
+
+    # ---- lock / unlock ----------------------------------------------------
+    def _open(self):
+        if xdisplay is None:
+            raise X11Error("python-xlib is required for the X11 backend")
+        try:
+            self.display = xdisplay.Display(self.display_name)
+        except Exception as exc:  # Xlib raises several unrelated types
+            raise X11Error(f"Cannot open X display: {exc}") from exc
+        if self.unlock_keys:
+            keycodes = self.resolve_keys(self.unlock_keys)
+            if not keycodes:
+                warnings.warn(f"unlock keys {self.unlock_keys} do not all exist on "
+                              f"the X server's keymap; using the default unlock keys",
+                              RuntimeWarning)
+                keycodes = self.resolve_keys(DEFAULT_UNLOCK_KEYS)
+            self.set_unlock_keycodes(keycodes)
+
+    def _grab(self):
+        self.reset_keys()
+        root = self.display.screen().root
+        status = root.grab_keyboard(False, X.GrabModeAsync, X.GrabModeAsync, X.CurrentTime)
+        if status != X.GrabSuccess:
+            return False
+        if self.grab_pointer:
+            status = root.grab_pointer(
+                False, POINTER_EVENT_MASK, X.GrabModeAsync, X.GrabModeAsync,
+                X.NONE, X.NONE, X.CurrentTime,
+            )
+            if status != X.GrabSuccess:
+                self.display.ungrab_keyboard(X.CurrentTime)
+                self.display.flush()
+                return False
+        self.display.flush()
+        self._wake_r, self._wake_w = os.pipe()
+        return True
+
+    def lock(self):
+        """Grab input and run the event loop on a background thread.
+
+        Returns False if the grab failed (another client holds it).
+        """
+        with self._state_lock:
+            if self.locked:
+                return True
+            if self.display is None:
+                self._open()
+            if not self._grab():
+                return False
+            self.locked = True
+            self.lock_thread = threading.Thread(
+                target=self._run_loop, name="macos-lock-x11", daemon=True
+            )
+            self.lock_thread.start()
+        return True
+
+    def run(self):
+        """Grab input and process events on the calling thread until unlocked."""
+        with self._state_lock:
+            if self.display is None:
+                self._open()
+            if not self._grab():
+                return False
+            self.locked = True
+        self._run_loop()
+        return True
+
+    def _run_loop(self):
+        self._notify("lock_started", unlock_keycodes=sorted(self.unlock_keycodes))
+        display = self.display
+        fds = [display.fileno(), self._wake_r]
+        try:
+            while self.locked:
+                while self.locked and display.pending_events():
+                    self.handle_event(display.next_event(), self._queued_event)
+                if self.locked:
+                    select.select(fds, [], [])
+        finally:
+            display.ungrab_pointer(X.CurrentTime)
+            display.ungrab_keyboard(X.CurrentTime)
+            display.flush()
+            # Under the state lock so _release never writes to a closed fd.
+            with self._state_lock:
+                os.close(self._wake_r)
+                os.close(self._wake_w)
+                self._wake_r = self._wake_w = None
+
+    def _release(self):
+        # Wake select(); the loop thread owns the connection and ungrabs.
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
@@ -20,6 +20,7 @@ OPTIONS = {
         'NSHighResolutionCapable': True,
     },
     'includes': ['Quartz', 'PyQt6'],
+    'packages': ['macos_lock'],
 }
 
 setup(
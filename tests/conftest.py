@@ -1,10 +1,13 @@
 """Test configuration - makes modules with hyphens importable and mocks macOS-only deps."""
 
 import importlib
+import signal
 import sys
 import os
 from unittest.mock import MagicMock
 
+import pytest
+
 # Add project root to path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
@@ -29,8 +32,16 @@ if "Quartz" not in sys.modules:
     quartz_mock.kCGEventScrollWheel = 22
     quartz_mock.kCGEventOtherMouseDown = 25
     quartz_mock.kCGEventOtherMouseUp = 26
+    quartz_mock.kCGEventOtherMouseDragged = 27
+    quartz_mock.kCGEventTabletPointer = 23
+    quartz_mock.kCGEventTabletProximity = 24
+    quartz_mock.kCGEventTapDisabledByTimeout = 0xFFFFFFFE
+    quartz_mock.kCGEventTapDisabledByUserInput = 0xFFFFFFFF
     quartz_mock.kCFAllocatorDefault = None
     quartz_mock.kCFRunLoopCommonModes = "kCFRunLoopCommonModes"
+    quartz_mock.kCGEventSourceStateHIDSystemState = 1
+    quartz_mock.kCGEventSourceUnixProcessID = 41
+    quartz_mock.CGEventGetTimestamp.return_value = 0
     sys.modules["Quartz"] = quartz_mock
 
 # Mock PyQt6 if not available (for CI without display)
@@ -54,3 +65,52 @@ _spec2 = importlib.util.spec_from_file_location(
 macos_lock_cli = importlib.util.module_from_spec(_spec2)
 sys.modules["macos_lock_cli"] = macos_lock_cli
 _spec2.loader.exec_module(macos_lock_cli)
+
+
+# ---------------------------------------------------------------------------
+# Timing comparisons: opt-in, too noisy for shared CI runners
+# ---------------------------------------------------------------------------
+def pytest_addoption(parser):
+    parser.addoption("--timing", action="store_true",
+                     help="also run the per-event cost comparisons (marked 'timing')")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "timing: wall-clock cost comparison, skipped unless --timing")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--timing"):
+        return
+    skip = pytest.mark.skip(reason="timing comparison; run with --timing")
+    for item in items:
+        if "timing" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def _profiler_signal_restored():
+    """cli.main() and profiler.install() block SIGUSR1 and take it over.
+
+    Restored after each test, or child processes started by later tests
+    would inherit the blocked signal.
+    """
+    handler = signal.getsignal(signal.SIGUSR1)
+    mask = signal.pthread_sigmask(signal.SIG_BLOCK, [])
+    yield
+    signal.signal(signal.SIGUSR1, handler)
+    signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+
+
+# ---------------------------------------------------------------------------
+# Trace replay (helpers in tests/helpers.py)
+# ---------------------------------------------------------------------------
+@pytest.fixture
+def trace_quartz(monkeypatch):
+    """Reads keycode and timestamp from TraceEvent instead of a CGEvent."""
+    Quartz = sys.modules["Quartz"]
+    monkeypatch.setattr(Quartz, "CGEventGetIntegerValueField",
+                        lambda event, field: event.keycode)
+    monkeypatch.setattr(Quartz, "CGEventGetTimestamp", lambda event: event.timestamp)
+    monkeypatch.setattr(Quartz, "CGEventTapEnable", lambda tap, enable: None)
@@ -0,0 +1,59 @@
+"""
+Trace replay helpers: synthetic events fed straight into the tap callback.
+
+The events only carry what the ``trace_quartz`` fixture (conftest) reads
+back: a keycode and a timestamp in nanoseconds.
+"""
+
+import time
+
+import Quartz
+
+MS = 1_000_000
+DOWN = Quartz.kCGEventKeyDown
+UP = Quartz.kCGEventKeyUp
+MOVE = Quartz.kCGEventMouseMoved
+
+
+class TraceEvent:
+    __slots__ = ("keycode", "timestamp")
+
+    def __init__(self, keycode, timestamp):
+        self.keycode = keycode
+        self.timestamp = timestamp
+
+
+def replay(locker, trace):
+    """Feeds ``(event_type, keycode, ms)`` tuples; returns the index that unlocked."""
+    locker.locked = True
+    for i, (event_type, keycode, ms) in enumerate(trace):
+        locker.event_callback(None, event_type, TraceEvent(keycode, ms * MS), None)
+        if not locker.locked:
+            return i
+    return None
+
+
+def recorder(locker):
+    """Collects the locker's ``(kind, fields)`` listener events in a list."""
+    events = []
+    locker.listeners.append(lambda kind, fields: events.append((kind, fields)))
+    return events
+
+
+def per_event(locker, events, repeat=1, reset=False):
+    """Best seconds per event over ``repeat`` runs of ``(event_type, event)``.
+
+    The locker is locked before each run; with ``reset`` its key and
+    attempt state is cleared too, otherwise it carries over.
+    """
+    callback = locker.event_callback
+    best = float("inf")
+    for _ in range(repeat):
+        locker.locked = True
+        if reset:
+            locker.reset_keys()
+        start = time.perf_counter()
+        for event_type, event in events:
+            callback(None, event_type, event, None)
+        best = min(best, time.perf_counter() - start)
+    return best / len(events)
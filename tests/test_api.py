@@ -0,0 +1,249 @@
+"""Tests for the programmatic lock API (sync and asyncio)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import macos_lock
+from macos_lock import api, audit
+from macos_lock.config import unlock_keycodes
+from macos_lock.locker import InputLocker, event_mask_for
+
+import Quartz
+
+
+class FakeLocker:
+    """Stand-in backend with the InputLocker interface, no event tap."""
+
+    instances = []
+    event_names = {1: "key_down"}
+
+    def __init__(self, unlock_keycodes=None, profile="full", on_unlock=None,
+                 hold_ms=0):
+        self.unlock_keycodes = unlock_keycodes
+        self.hold_ms = hold_ms
+        self.profile = profile
+        self.on_unlock = on_unlock
+        self.locked = False
+        self.lock_result = True
+        self.unlock_calls = []
+        self.listeners = []
+        self.blocked_counts = {1: 0}
+        FakeLocker.instances.append(self)
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        kwargs.setdefault("unlock_keycodes", unlock_keycodes(config))
+        kwargs.setdefault("hold_ms", config.get("unlock_hold_ms", 0))
+        return cls(**kwargs)
+
+    def lock(self):
+        if not self.lock_result:
+            return False
+        self.locked = True
+        for listener in self.listeners:
+            listener("lock_started", {})
+        return True
+
+    def unlock(self, reason="api"):
+        self.unlock_calls.append(reason)
+        if not self.locked:
+            return False
+        self.locked = False
+        for listener in self.listeners:
+            listener("unlocked", {"reason": reason})
+        self.on_unlock(reason)
+        return True
+
+    def press_chord(self):
+        """Simulates the tap thread seeing the unlock chord."""
+        self.unlock("chord")
+
+
+class FailingLocker(FakeLocker):
+    def lock(self):
+        return False
+
+
+class SlowLocker(FakeLocker):
+    """Takes a while to install its tap, like a busy tap thread."""
+
+    def lock(self):
+        time.sleep(0.2)
+        return super().lock()
+
+
+@pytest.fixture(autouse=True)
+def _reset_instances():
+    FakeLocker.instances.clear()
+
+
+class TestSyncApi:
+
+    def test_context_manager_locks_and_unlocks(self):
+        with macos_lock.locked(backend=FakeLocker) as session:
+            assert session.locked
+            assert session.locker.locked
+        assert not session.locker.locked
+        assert session.unlocked.result(0) == "api"
+
+    def test_profile_and_keycodes_passed_to_backend(self):
+        with macos_lock.locked(profile="keyboard-only", unlock_keycodes=[0, 1],
+                               backend=FakeLocker) as session:
+            assert session.locker.profile == "keyboard-only"
+            assert session.locker.unlock_keycodes == [0, 1]
+
+    def test_chord_unlock_resolves_future(self):
+        with macos_lock.locked(backend=FakeLocker) as session:
+            threading.Thread(target=session.locker.press_chord).start()
+            assert session.wait(timeout=2) == "chord"
+            assert not session.locked
+
+    def test_timeout_failsafe_unlocks(self):
+        with macos_lock.locked(timeout=0.05, backend=FakeLocker) as session:
+            assert session.wait(timeout=2) == "timeout"
+            assert not session.locker.locked
+
+    @pytest.mark.parametrize("timeout", [None, 0, 3600])
+    def test_timeout_clamped_to_max(self, timeout):
+        session = macos_lock.locked(timeout=timeout, backend=FakeLocker).start()
+        assert session.timeout == api.MAX_LOCK_SECONDS
+        assert session._timer.interval == api.MAX_LOCK_SECONDS
+        session.stop()
+        assert session._timer is None
+
+    def test_sessions_audited(self, monkeypatch, tmp_path):
+        path = str(tmp_path / "audit.jsonl")
+        monkeypatch.setattr(audit, "AUDIT_PATH", path)
+        monkeypatch.setattr(api.config, "load_config", lambda: {"audit_log": True})
+        with macos_lock.locked(timeout=0.05, backend=FakeLocker) as session:
+            session.wait(timeout=2)
+        assert session.audit is None
+        with macos_lock.locked(backend=FakeLocker) as session:
+            session.locker.press_chord()
+        records = list(audit.iter_records(path))
+        assert [r["reason"] for r in records] == ["timeout", "chord"]
+
+    def test_not_audited_by_default(self, monkeypatch):
+        monkeypatch.setattr(api.config, "load_config", lambda: {})
+        with macos_lock.locked(backend=FakeLocker) as session:
+            assert session.audit is None
+
+    def test_first_reason_wins(self):
+        with macos_lock.locked(backend=FakeLocker) as session:
+            session.locker.press_chord()
+        assert session.unlocked.result(0) == "chord"
+
+    def test_lock_failure_raises(self):
+        with pytest.raises(macos_lock.LockError):
+            with macos_lock.locked(backend=FailingLocker):
+                pass
+
+    def test_session_cannot_start_twice(self):
+        session = macos_lock.locked(backend=FakeLocker).start()
+        with pytest.raises(api.LockError):
+            session.start()
+        session.stop()
+
+
+class TestAsyncApi:
+
+    @pytest.mark.asyncio
+    async def test_async_context_manager(self):
+        async with macos_lock.locked(backend=FakeLocker) as session:
+            assert session.locked
+        assert await session == "api"
+
+    @pytest.mark.asyncio
+    async def test_await_session_for_chord(self):
+        async with macos_lock.locked(backend=FakeLocker) as session:
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01, lambda: threading.Thread(
+                target=session.locker.press_chord).start())
+            assert await asyncio.wait_for(session, 2) == "chord"
+
+    @pytest.mark.asyncio
+    async def test_event_loop_not_blocked_while_locked(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        async with macos_lock.locked(timeout=0.1, backend=FakeLocker) as session:
+            assert await asyncio.wait_for(session, 2) == "timeout"
+        task.cancel()
+        assert ticks > 3
+
+    @pytest.mark.asyncio
+    async def test_cancel_during_start_releases_lock(self):
+        session = macos_lock.locked(backend=SlowLocker)
+        entered = []
+
+        async def locked_section():
+            async with session:
+                entered.append(True)
+
+        task = asyncio.create_task(locked_section())
+        await asyncio.sleep(0.05)   # start() is blocked in lock()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not entered
+        assert not session.locker.locked
+        assert session._timer is None
+        assert session.unlocked.result(0) == "api"
+
+    @pytest.mark.asyncio
+    async def test_async_lock_failure_raises(self):
+        with pytest.raises(macos_lock.LockError):
+            async with macos_lock.locked(backend=FailingLocker):
+                pass
+
+
+class TestInputLocker:
+    """The real Qt-free locker against the mocked Quartz module."""
+
+    def test_unknown_profile_rejected(self):
+        with pytest.raises(ValueError):
+            event_mask_for("mouse-only")
+
+    def test_keyboard_only_mask(self):
+        assert event_mask_for("keyboard-only") == (
+            (1 << Quartz.kCGEventKeyDown) | (1 << Quartz.kCGEventKeyUp)
+        )
+
+    def test_full_mask_includes_pointer(self):
+        mask = event_mask_for("full")
+        assert mask & (1 << Quartz.kCGEventMouseMoved)
+        assert mask & (1 << Quartz.kCGEventScrollWheel)
+
+    def test_chord_unlocks_once(self, monkeypatch):
+        reasons = []
+        locker = InputLocker(unlock_keycodes=[7, 8], on_unlock=reasons.append)
+        assert locker.lock()
+        locker.lock_thread.join(1)
+
+        keycodes = iter([7, 8])
+        monkeypatch.setattr(Quartz, "CGEventGetIntegerValueField",
+                            lambda event, field: next(keycodes))
+        assert locker.event_callback(None, Quartz.kCGEventKeyDown, "e", None) is None
+        assert locker.event_callback(None, Quartz.kCGEventKeyDown, "e", None) == "e"
+        assert not locker.locked
+        assert not locker.unlock("api")
+        assert reasons == ["chord"]
+
+    def test_unlocked_passes_events(self):
+        locker = InputLocker()
+        assert locker.event_callback(None, Quartz.kCGEventMouseMoved, "e", None) == "e"
+
+    def test_timeout_unlocks_real_locker(self):
+        with macos_lock.locked(timeout=0.05) as session:
+            start = time.monotonic()
+            assert session.wait(timeout=2) == "timeout"
+            assert time.monotonic() - start < 2
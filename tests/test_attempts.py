@@ -0,0 +1,211 @@
+"""Tests for failed-attempt tracking and lockout, driven by scripted key mashing."""
+
+import random
+
+import pytest
+
+from macos_lock.chord import ChordLocker
+from macos_lock.locker import InputLocker
+from tests.helpers import DOWN, MS, UP, TraceEvent, per_event, recorder
+
+SECOND = 1000 * MS
+KEYS = [k for k in range(51) if k not in (7, 8)]
+
+
+def press(locker, keys, t, gap=10 * MS):
+    """Presses ``keys`` in order, then releases them; True if it unlocked."""
+    matched = False
+    for i, keycode in enumerate(keys):
+        matched = locker.key_down(keycode, t + i * gap) or matched
+    for keycode in keys:
+        locker.key_up(keycode, t + len(keys) * gap)
+    return matched
+
+
+class TestMatching:
+
+    def test_exact_chord_unlocks(self):
+        assert press(ChordLocker([7, 8]), [7, 8], 0)
+
+    def test_chord_with_extra_key_rejected(self):
+        locker = ChordLocker([7, 8])
+        assert not press(locker, [0, 7, 8], 0)
+        assert not press(locker, [7, 0, 8], SECOND)
+
+    def test_partial_progress_is_not_a_failure(self):
+        locker = ChordLocker([0, 1, 2])
+        for i in range(20):
+            locker.key_down(0, i * SECOND)
+            locker.key_down(1, i * SECOND + MS)
+            locker.key_up(1, i * SECOND + 2 * MS)
+            locker.key_up(0, i * SECOND + 3 * MS)
+        assert locker.locked_out_until == 0
+        assert press(locker, [2, 1, 0], 30 * SECOND)
+
+    def test_key_repeat_is_not_a_failure(self):
+        locker = ChordLocker([7, 8])
+        locker.key_down(0, 0)
+        locker.key_down(1, MS)
+        for i in range(100):
+            locker.key_down(1, (i + 2) * 50 * MS)
+        assert locker._tokens == locker.attempt_burst - 1
+
+
+class TestLockout:
+
+    def exhaust(self, locker, t=0):
+        for i in range(locker.attempt_burst + 1):
+            press(locker, [0, 1], t + i * 100 * MS)
+        return t + (locker.attempt_burst + 1) * 100 * MS
+
+    def test_chord_ignored_during_lockout(self):
+        locker = ChordLocker([7, 8])
+        events = recorder(locker)
+        t = self.exhaust(locker)
+        assert events == [("unlock_lockout", {"seconds": 5.0, "count": 1})]
+        assert not press(locker, [7, 8], t)
+        assert press(locker, [7, 8], locker.locked_out_until)
+
+    def test_attempts_during_lockout_do_not_extend_it(self):
+        locker = ChordLocker([7, 8])
+        t = self.exhaust(locker)
+        until = locker.locked_out_until
+        for i in range(50):
+            press(locker, [0, 1], t + i * 50 * MS)
+        assert locker.locked_out_until == until
+
+    def test_lockout_doubles_up_to_cap(self):
+        locker = ChordLocker([7, 8])
+        events = recorder(locker)
+        t = 0
+        for _ in range(9):
+            t = self.exhaust(locker, t)
+            t = locker.locked_out_until
+        assert [f["seconds"] for _, f in events] == [5, 10, 20, 40, 80, 160, 300, 300, 300]
+
+    def test_tokens_refill_from_timestamps(self):
+        locker = ChordLocker([7, 8])
+        for i in range(locker.attempt_burst):
+            press(locker, [0, 1], i * 100 * MS)
+        # Refill window passes between attempts: never locked out.
+        for i in range(1, 51):
+            press(locker, [0, 1], 400 * MS + i * locker.attempt_refill_ns)
+        assert locker.locked_out_until == 0
+
+    def test_quiet_period_resets_backoff(self):
+        locker = ChordLocker([7, 8])
+        events = recorder(locker)
+        self.exhaust(locker)
+        self.exhaust(locker, locker.locked_out_until)
+        self.exhaust(locker, locker.locked_out_until + 400 * SECOND)
+        assert [f["seconds"] for _, f in events] == [5, 10, 5]
+
+    def test_new_lock_resets_attempts(self):
+        locker = ChordLocker([7, 8])
+        t = self.exhaust(locker)
+        locker.reset_keys()
+        assert press(locker, [7, 8], t)
+
+    def test_mashing_during_hold_spends_tokens(self):
+        locker = ChordLocker([7, 8], hold_ms=500)
+        events = recorder(locker)
+        locker.key_down(7, 0)
+        locker.key_down(8, MS)
+        for i, keycode in enumerate(KEYS[:31]):
+            assert not locker.key_down(keycode, (100 + 20 * i) * MS)
+        assert not locker.key_down(8, 2 * SECOND)
+        assert locker.locked_out_until > 0
+        assert events[0][0] == "unlock_lockout"
+
+    def test_hold_cannot_complete_during_lockout(self):
+        locker = ChordLocker([7, 8], hold_ms=500)
+        t = self.exhaust(locker)
+        locker.key_down(7, t)
+        assert not locker.key_down(8, t + MS)
+        assert not locker.key_down(8, t + SECOND)
+        assert locker.chord_since is None
+
+
+class TestMashing:
+    """Scripted brute-force streams."""
+
+    def test_palm_mashing_never_unlocks(self):
+        rng = random.Random(37)
+        locker = ChordLocker([7, 8])
+        t = 0
+        for _ in range(5000):
+            keys = rng.sample(KEYS, rng.randint(1, 6)) + [7, 8]
+            rng.shuffle(keys)
+            assert not press(locker, keys, t, gap=5 * MS)
+            t += 150 * MS
+
+    def test_pair_enumeration_is_throttled(self):
+        """Ordered pairs at 10/s for 10 minutes, chord never among them."""
+        locker = ChordLocker([7, 8])
+        rng = random.Random(7)
+        evaluated = 0
+        t = 0
+        while t < 600 * SECOND:
+            a, b = rng.sample(KEYS, 2)
+            if t >= locker.locked_out_until:
+                evaluated += 1
+            press(locker, [a, b], t)
+            t += 100 * MS
+        assert evaluated < 60, evaluated
+
+    @pytest.mark.parametrize("interval", [2, 10, 30, 60])
+    def test_paced_attacker_limited_to_refill_rate(self, interval):
+        """Pairs paced at up to one per refill period for an hour."""
+        locker = ChordLocker([7, 8])
+        rng = random.Random(interval)
+        evaluated = 0
+        t = 0
+        while t < 3600 * SECOND:
+            if t >= locker.locked_out_until:
+                evaluated += 1
+            press(locker, rng.sample(KEYS, 2), t)
+            t += interval * SECOND
+        assert evaluated <= 3600 * SECOND // locker.attempt_refill_ns + locker.attempt_burst
+
+    def test_owner_gets_in_after_lockout(self):
+        rng = random.Random(1)
+        locker = ChordLocker([7, 8])
+        t = 0
+        for _ in range(200):
+            press(locker, rng.sample(KEYS, 2), t)
+            t += 100 * MS
+        assert locker.locked_out_until > t
+        assert press(locker, [7, 8], locker.locked_out_until)
+
+
+@pytest.mark.timing
+class TestCost:
+    """Attempt tracking keeps no history: per-event cost is flat."""
+
+    N = 20_000
+
+    def _mash(self, offset):
+        rng = random.Random(offset)
+        events = []
+        t = offset
+        while len(events) < self.N:
+            keys = rng.sample(KEYS, 3)
+            for keycode in keys:
+                events.append((DOWN, TraceEvent(keycode, t)))
+                t += 5 * MS
+            for keycode in keys:
+                events.append((UP, TraceEvent(keycode, t)))
+            t += 100 * MS
+        return events
+
+    def test_cost_flat_over_long_session(self, trace_quartz):
+        locker = InputLocker([7, 8])
+        first = min(per_event(locker, self._mash(0)) for _ in range(3))
+        for i in range(20):  # ~100k failed attempts of history
+            per_event(locker, self._mash((i + 1) * 10**12))
+        late = min(per_event(locker, self._mash(10**15)) for _ in range(3))
+        typing = min(per_event(InputLocker([7, 8]),
+                               [(DOWN, TraceEvent(0, i * MS)) for i in range(self.N)])
+                     for _ in range(3))
+        assert late < first * 1.5 + 100e-9, (first, late)
+        assert first < typing * 3 + 500e-9, (typing, first)
@@ -0,0 +1,232 @@
+"""Tests for the lock session audit log."""
+
+import gzip
+import json
+import os
+
+import pytest
+
+import macos_lock_cli as cli
+import macos_lock_gui as gui
+from macos_lock import audit
+from macos_lock.audit import AuditLog, iter_records, rotated_files
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "audit" / "audit.jsonl")
+
+
+def _session(log, reason="chord", end=1010.0):
+    log.listener("lock_started", {})
+    log._queue.put(("unlocked", end, {"reason": reason}))
+
+
+def _record(start, end=None, reason="chord"):
+    end = start + 5 if end is None else end
+    return {"start": start, "end": end, "duration": end - start,
+            "reason": reason, "blocked": {}, "blocked_total": 0}
+
+
+class TestAuditWriter:
+
+    def test_session_record_written(self, log_path):
+        counts = {5: 0, 10: 0}
+        log = AuditLog(log_path, counts=counts, type_names={5: "mouse_moved"},
+                       flush_interval=0.01).start()
+        log.listener("lock_started", {})
+        counts[5] += 7
+        counts[10] += 2
+        log.listener("unlock_matched", {"reason": "chord"})
+        log.stop()
+
+        (record,) = list(iter_records(log_path))
+        assert record["reason"] == "chord"
+        assert record["blocked"] == {"mouse_moved": 7, "10": 2}
+        assert record["blocked_total"] == 9
+        assert record["end"] >= record["start"]
+
+    def test_open_session_closed_on_exit(self, log_path):
+        log = AuditLog(log_path, flush_interval=10).start()
+        log.listener("lock_started", {})
+        log.stop()
+        (record,) = list(iter_records(log_path))
+        assert record["reason"] == "exit"
+
+    def test_only_first_unlock_ends_session(self, log_path):
+        log = AuditLog(log_path, flush_interval=10).start()
+        log.listener("lock_started", {})
+        log.listener("unlock_matched", {"reason": "chord"})
+        log.listener("unlocked", {"reason": "button"})
+        log.stop()
+        assert [r["reason"] for r in iter_records(log_path)] == ["chord"]
+
+    def test_listener_never_touches_file(self, log_path, monkeypatch):
+        log = AuditLog(log_path)
+        monkeypatch.setattr("builtins.open", pytest.fail)
+        log.listener("lock_started", {})
+        log.listener("unlock_matched", {"reason": "chord"})
+        assert not os.path.exists(log_path)
+
+    def test_batched_writes(self, log_path, monkeypatch):
+        log = AuditLog(log_path)
+        os.makedirs(os.path.dirname(log_path))
+        for _ in range(50):
+            _session(log)
+        writes = []
+        real_write = log._write
+        monkeypatch.setattr(log, "_write", lambda r: (writes.append(len(r)), real_write(r)))
+        log._write(log._drain())
+        assert writes == [50]
+        assert len(list(iter_records(log_path))) == 50
+
+    def test_appends_to_existing_log(self, log_path):
+        for _ in range(2):
+            log = AuditLog(log_path, flush_interval=10).start()
+            log.listener("lock_started", {})
+            log.listener("unlocked", {"reason": "button"})
+            log.stop()
+        assert len(list(iter_records(log_path))) == 2
+
+
+class TestRotation:
+
+    def test_rotates_by_size_and_compresses(self, log_path):
+        log = AuditLog(log_path, max_bytes=500)
+        os.makedirs(os.path.dirname(log_path))
+        for i in range(20):
+            log._write([_record(1000.0 + i)])
+        rotated = rotated_files(log_path)
+        assert rotated
+        for name in rotated:
+            assert name.endswith(".jsonl.gz")
+            with gzip.open(name, "rt") as f:
+                assert all(json.loads(line) for line in f)
+        assert os.path.getsize(log_path) < 500 + 200
+        starts = [r["start"] for r in iter_records(log_path)]
+        assert starts == [1000.0 + i for i in range(20)]
+
+    def test_rotates_by_age(self, log_path):
+        log = AuditLog(log_path, max_age=3600)
+        os.makedirs(os.path.dirname(log_path))
+        log._write([_record(1000.0)])
+        log._write([_record(2000.0)])
+        assert rotated_files(log_path) == []
+        log._write([_record(1000.0 + 7200)])
+        assert len(rotated_files(log_path)) == 1
+        assert [r["start"] for r in iter_records(log_path)] == [1000.0, 2000.0, 8200.0]
+
+    def test_age_survives_restart(self, log_path):
+        os.makedirs(os.path.dirname(log_path))
+        AuditLog(log_path)._write([_record(1000.0)])
+        log = AuditLog(log_path, max_age=3600, flush_interval=10).start()
+        log.stop()
+        assert log._opened_at == 1000.0
+
+    def test_keeps_bounded_number_of_rotations(self, log_path):
+        log = AuditLog(log_path, max_bytes=1, keep=3)
+        os.makedirs(os.path.dirname(log_path))
+        for i in range(10):
+            log._write([_record(1000.0 + i)])
+        assert len(rotated_files(log_path)) == 3
+
+    def test_crash_mid_compress_recovered_on_start(self, log_path, monkeypatch):
+        log = AuditLog(log_path)
+        os.makedirs(os.path.dirname(log_path))
+        log._write([_record(1000.0), _record(1010.0)])
+
+        def crash(src, dst):
+            dst.write(src.read(10))
+            raise KeyboardInterrupt  # killed while compressing
+
+        monkeypatch.setattr(audit.shutil, "copyfileobj", crash)
+        with pytest.raises(KeyboardInterrupt):
+            log.rotate()
+        monkeypatch.undo()
+        assert rotated_files(log_path) == []
+        assert os.path.exists(audit.rotating_path(log_path))
+        assert [r["start"] for r in iter_records(log_path)] == [1000.0, 1010.0]
+
+        AuditLog(log_path, flush_interval=10).start().stop()
+        assert not os.path.exists(audit.rotating_path(log_path))
+        assert len(rotated_files(log_path)) == 1
+        assert os.listdir(os.path.dirname(log_path)) == [
+            os.path.basename(rotated_files(log_path)[0])]
+        assert [r["start"] for r in iter_records(log_path)] == [1000.0, 1010.0]
+
+
+class TestReader:
+
+    @pytest.fixture
+    def history(self, log_path):
+        log = AuditLog(log_path, max_bytes=300)
+        os.makedirs(os.path.dirname(log_path))
+        for i, reason in enumerate(["chord", "button", "chord", "timeout", "chord"]):
+            log._write([_record(1000.0 + 100 * i, reason=reason)])
+        return log_path
+
+    def test_filter_by_reason(self, history):
+        assert len(list(iter_records(history, reason="chord"))) == 3
+
+    def test_filter_by_time(self, history):
+        records = list(iter_records(history, since=1150.0, until=1310.0))
+        assert [r["start"] for r in records] == [1200.0, 1300.0]
+
+    def test_streams_lazily(self, history):
+        records = iter_records(history)
+        assert next(records)["start"] == 1000.0
+
+    def test_skips_torn_line(self, log_path):
+        os.makedirs(os.path.dirname(log_path))
+        with open(log_path, "w") as f:
+            f.write(json.dumps(_record(1000.0)) + "\n" + '{"start": 10')
+        assert len(list(iter_records(log_path))) == 1
+
+    def test_truncated_rotated_file_tolerated(self, log_path):
+        os.makedirs(os.path.dirname(log_path))
+        name = log_path.replace(".jsonl", "-20261001T000000000000.jsonl.gz")
+        with gzip.open(name, "wt") as f:
+            for i in range(200):
+                f.write(json.dumps(_record(1000.0 + i)) + "\n")
+        with open(name, "r+b") as f:
+            f.truncate(os.path.getsize(name) // 2)
+        AuditLog(log_path)._write([_record(5000.0)])
+        starts = [r["start"] for r in iter_records(log_path)]
+        assert starts[-1] == 5000.0
+        assert starts[:-1] == [1000.0 + i for i in range(len(starts) - 1)]
+
+    def test_missing_log_is_empty(self, log_path):
+        assert list(iter_records(log_path)) == []
+
+    def test_command_output(self, history, capsys):
+        audit.main(["--path", history, "--reason", "timeout"])
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line)["reason"] for line in lines] == ["timeout"]
+
+
+class TestLockerWiring:
+
+    def test_cli_flag(self):
+        assert cli.parse_args(["--audit"]).audit
+        assert not cli.parse_args([]).audit
+
+    def test_cli_interrupt_reason(self, monkeypatch, log_path):
+        monkeypatch.setattr(cli, "load_config", lambda: {"unlock_keys": ["x", "c"]})
+        monkeypatch.setattr(audit, "AUDIT_PATH", log_path)
+
+        def interrupted(self):
+            self.locked = True
+            self._notify("lock_started")
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(gui.InputLocker, "run", interrupted)
+        cli.main(["--audit", "--backend", "quartz"])
+        assert [r["reason"] for r in iter_records(log_path)] == ["interrupt"]
+
+    def test_gui_button_unlock_reason(self, monkeypatch):
+        events = []
+        locker = gui.InputLocker([7, 8])
+        locker.locked = True
+        locker.listeners.append(lambda kind, fields: events.append((kind, fields)))
+        locker.unlock("button")
+        assert events == [("unlocked", {"reason": "button"})]
@@ -2,9 +2,19 @@
 
 import json
 import os
+import random
+import signal
+import subprocess
+import sys
 import tempfile
+import time
+import warnings
+
 import pytest
 
+from macos_lock import config, keylayout, keymap
+from macos_lock.config import ConfigWriter, save_config
+
 # We need to patch CONFIG_PATH before importing, so import the module parts we need
 import importlib
 
@@ -19,8 +29,9 @@ def config_file(tmp_path):
 def gui_module(config_file, monkeypatch):
     """Imports macos-lock-gui with patched CONFIG_PATH."""
     import macos_lock_gui as mod
+    from macos_lock import config
 
-    monkeypatch.setattr(mod, "CONFIG_PATH", config_file)
+    monkeypatch.setattr(config, "CONFIG_PATH", config_file)
     return mod
 
 
@@ -29,29 +40,29 @@ class TestKeycodeMap:
 
     def test_known_keys_exist(self, gui_module):
         for key in ["a", "b", "c", "x", "z", "1", "0", "space", "return"]:
-            assert key in gui_module.KEYCODE_MAP, f"Key '{key}' not in KEYCODE_MAP"
+            assert key in keymap.KEYCODE_MAP, f"Key '{key}' not in KEYCODE_MAP"
 
     def test_x_keycode_is_7(self, gui_module):
-        assert gui_module.KEYCODE_MAP["x"] == 7
+        assert keymap.KEYCODE_MAP["x"] == 7
 
     def test_c_keycode_is_8(self, gui_module):
-        assert gui_module.KEYCODE_MAP["c"] == 8
+        assert keymap.KEYCODE_MAP["c"] == 8
 
     def test_reverse_map_consistent(self, gui_module):
-        for name, code in gui_module.KEYCODE_MAP.items():
-            assert gui_module.REVERSE_KEYCODE_MAP[code] == name
+        for name, code in keymap.KEYCODE_MAP.items():
+            assert keymap.keycode_name(code) == name
 
-    def test_keys_to_keycodes(self, gui_module):
-        result = gui_module.keys_to_keycodes(["x", "c"])
-        assert result == [7, 8]
+    def test_keys_to_keycodes(self):
+        assert keylayout.keys_to_keycodes(["x", "c"]) == [7, 8]
 
-    def test_keys_to_keycodes_unknown_key_skipped(self, gui_module):
-        result = gui_module.keys_to_keycodes(["x", "UNKNOWN", "c"])
-        assert result == [7, 8]
+    def test_keys_to_keycodes_unknown_key_rejects_chord(self):
+        assert keylayout.keys_to_keycodes(["x", "UNKNOWN", "c"]) == []
 
-    def test_keys_to_keycodes_empty(self, gui_module):
-        result = gui_module.keys_to_keycodes([])
-        assert result == []
+    def test_keys_to_keycodes_duplicate_rejects_chord(self):
+        assert keylayout.keys_to_keycodes(["x", "x"]) == []
+
+    def test_keys_to_keycodes_empty(self):
+        assert keylayout.keys_to_keycodes([]) == []
 
 
 class TestConfig:
@@ -63,7 +74,7 @@ class TestConfig:
 
     def test_save_and_load_roundtrip(self, gui_module, config_file):
         config = {"unlock_keys": ["a", "s", "d"]}
-        gui_module.save_config(config)
+        save_config(config)
 
         loaded = gui_module.load_config()
         assert loaded["unlock_keys"] == ["a", "s", "d"]
@@ -72,16 +83,17 @@ class TestConfig:
         with open(config_file, "w") as f:
             f.write("not valid json{{{")
 
-        config = gui_module.load_config()
+        with pytest.warns(RuntimeWarning):
+            config = gui_module.load_config()
         assert config["unlock_keys"] == ["x", "c"]
 
     def test_save_creates_file(self, gui_module, config_file):
         assert not os.path.exists(config_file)
-        gui_module.save_config({"unlock_keys": ["q", "w"]})
+        save_config({"unlock_keys": ["q", "w"]})
         assert os.path.exists(config_file)
 
     def test_saved_file_is_valid_json(self, gui_module, config_file):
-        gui_module.save_config({"unlock_keys": ["m", "n"]})
+        save_config({"unlock_keys": ["m", "n"]})
         with open(config_file) as f:
             data = json.load(f)
         assert data["unlock_keys"] == ["m", "n"]
@@ -126,3 +138,110 @@ class TestInputLockerState:
         locker = gui_module.InputLocker.__new__(gui_module.InputLocker)
         locker.unlock_keycodes = set([0, 1, 2])
         assert locker.unlock_keycodes == {0, 1, 2}
+
+
+class TestAtomicSave:
+    """save_config writes via temp file + rename and keeps a backup."""
+
+    def test_backup_written(self, gui_module, config_file):
+        save_config({"unlock_keys": ["a", "s"]})
+        with open(config.backup_path(config_file)) as f:
+            assert json.load(f)["unlock_keys"] == ["a", "s"]
+        assert not os.path.exists(config_file + ".tmp")
+
+    def test_recovers_from_backup(self, gui_module, config_file):
+        save_config({"unlock_keys": ["a", "s"]})
+        with open(config_file, "w") as f:
+            f.write('{"unlock_keys": ["a", ')     # torn write
+        with pytest.warns(RuntimeWarning, match="last-known-good"):
+            loaded = gui_module.load_config()
+        assert loaded["unlock_keys"] == ["a", "s"]
+
+    def test_warns_when_falling_back_to_defaults(self, gui_module, config_file):
+        with open(config_file, "w") as f:
+            f.write("[]")
+        with pytest.warns(RuntimeWarning, match="default unlock keys"):
+            assert gui_module.load_config()["unlock_keys"] == ["x", "c"]
+
+    def test_missing_file_is_silent(self, gui_module, recwarn):
+        gui_module.load_config()
+        assert not recwarn.list
+
+
+class TestConfigWriter:
+
+    def test_coalesces_rapid_changes(self, config_file):
+        writer = ConfigWriter(config_file, delay=0.05).start()
+        for i in range(10_000):
+            writer.submit({"unlock_keys": ["x", "c"], "n": i})
+        deadline = time.time() + 5
+        while writer.writes == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        writer.stop()
+        assert writer.writes <= 2, (writer.submitted, writer.writes)
+        with open(config_file) as f:
+            assert json.load(f)["n"] == 9999
+
+    def test_max_delay_bounds_latency(self, config_file):
+        writer = ConfigWriter(config_file, delay=0.05, max_delay=0.2).start()
+        start = time.time()
+        while time.time() - start < 0.5:
+            writer.submit({"n": time.time()})
+            time.sleep(0.01)
+        assert writer.writes >= 1
+        writer.stop()
+
+    def test_snapshot_taken_at_submit(self, config_file):
+        writer = ConfigWriter(config_file, delay=10)
+        cfg = {"unlock_keys": ["a", "s"]}
+        writer.submit(cfg)
+        cfg["unlock_keys"].append("d")
+        writer.flush()
+        with open(config_file) as f:
+            assert json.load(f)["unlock_keys"] == ["a", "s"]
+
+    def test_stop_flushes_pending(self, config_file):
+        writer = ConfigWriter(config_file, delay=10).start()
+        writer.submit({"unlock_keys": ["q", "w"]})
+        writer.stop()
+        assert writer.writes == 1
+        with open(config_file) as f:
+            assert json.load(f)["unlock_keys"] == ["q", "w"]
+
+
+CRASH_WRITER = r"""
+import sys
+sys.path.insert(0, {root!r})
+from macos_lock.config import save_config
+
+i = 0
+while True:
+    keys = ["a", "s"] if i % 2 else ["q", "w", "e"]
+    save_config({{"unlock_keys": keys, "n": i, "pad": "x" * 4096}}, {path!r})
+    i += 1
+"""
+
+
+class TestCrashSafety:
+    """SIGKILL the writer mid-operation; the config must stay loadable."""
+
+    def test_kill_during_writes(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "config.json")
+        monkeypatch.setattr(config, "CONFIG_PATH", path)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = CRASH_WRITER.format(root=root, path=path)
+        rng = random.Random(35)
+        for _ in range(15):
+            proc = subprocess.Popen([sys.executable, "-c", code])
+            deadline = time.time() + 5
+            while not os.path.exists(path) and time.time() < deadline:
+                time.sleep(0.005)
+            time.sleep(rng.uniform(0.01, 0.1))
+            proc.send_signal(signal.SIGKILL)
+            proc.wait()
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                loaded = config.load_config()
+            assert loaded["unlock_keys"] in (["a", "s"], ["q", "w", "e"])
+            with open(path) as f:
+                json.load(f)
@@ -0,0 +1,149 @@
+"""Tests for the shared core package used by both entry points."""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+import Quartz
+
+import macos_lock_cli as cli
+import macos_lock_gui as gui
+from macos_lock import config, keymap, locker
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestKeymapTable:
+
+    def test_table_indexed_by_keycode(self):
+        for name, code in keymap.KEYCODE_MAP.items():
+            assert keymap.KEYCODE_NAMES[code] == name
+
+    def test_gaps_are_unmapped(self):
+        assert keymap.keycode_name(10) is None
+        assert keymap.keycode_name(52) is None
+
+    def test_out_of_range(self):
+        assert keymap.keycode_name(-1) is None
+        assert keymap.keycode_name(500) is None
+
+    def test_table_is_immutable(self):
+        assert isinstance(keymap.KEYCODE_NAMES, tuple)
+
+
+class TestSharedConfig:
+
+    @pytest.fixture(autouse=True)
+    def _config_path(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "CONFIG_PATH", str(tmp_path / "config.json"))
+
+    def test_defaults_not_shared_between_calls(self):
+        first = config.load_config()
+        first["unlock_keys"].append("q")
+        assert config.load_config()["unlock_keys"] == ["x", "c"]
+
+    def test_unlock_keycodes_fallback(self):
+        with pytest.warns(RuntimeWarning):
+            assert config.unlock_keycodes({"unlock_keys": ["nope"]}) == [7, 8]
+        with pytest.warns(RuntimeWarning):
+            assert config.unlock_keycodes({"unlock_keys": ["x", "nope"]}) == [7, 8]
+        assert config.unlock_keycodes({}) == [7, 8]
+
+    def test_unlock_keycodes(self):
+        assert config.unlock_keycodes({"unlock_keys": ["a", "s"]}) == [0, 1]
+
+    def test_entry_points_share_core(self):
+        assert cli.load_config is gui.load_config is config.load_config
+        assert cli.load_backend("quartz")[0] is gui.InputLocker is locker.InputLocker
+
+
+class TestEngine:
+
+    @pytest.fixture
+    def engine(self, monkeypatch):
+        keys = []
+        monkeypatch.setattr(Quartz, "CGEventGetIntegerValueField",
+                            lambda event, field: keys.pop(0))
+        monkeypatch.setattr(Quartz, "CGEventTapEnable", lambda tap, enable: None)
+        eng = locker.InputLocker([7, 8])
+        eng.locked = True
+        eng.keys = keys
+        return eng
+
+    def _key(self, eng, event_type, keycode):
+        eng.keys.append(keycode)
+        return eng.event_callback(None, event_type, "e", None)
+
+    def test_chord_unlocks(self, engine):
+        assert self._key(engine, Quartz.kCGEventKeyDown, 7) is None
+        assert self._key(engine, Quartz.kCGEventKeyDown, 8) == "e"
+        assert not engine.locked
+
+    def test_released_key_breaks_chord(self, engine):
+        self._key(engine, Quartz.kCGEventKeyDown, 7)
+        self._key(engine, Quartz.kCGEventKeyUp, 7)
+        assert self._key(engine, Quartz.kCGEventKeyDown, 8) is None
+        assert engine.locked
+
+    def test_tablet_events_blocked(self, engine):
+        for event_type in (Quartz.kCGEventTabletPointer, Quartz.kCGEventTabletProximity,
+                           Quartz.kCGEventOtherMouseDragged):
+            assert engine.event_callback(None, event_type, "e", None) is None
+
+    def test_gui_mask_includes_tablet_events(self):
+        mask = gui.InputLocker().event_mask
+        assert mask & (1 << Quartz.kCGEventTabletPointer)
+
+    def test_run_blocks_until_unlocked(self, monkeypatch):
+        eng = locker.InputLocker()
+        events = []
+        eng.listeners.append(lambda kind, fields: events.append(kind))
+        monkeypatch.setattr(Quartz, "CFRunLoopRun", lambda: eng.unlock("chord"))
+        assert eng.run()
+        assert not eng.locked
+        assert events == ["lock_started", "unlocked"]
+
+    def test_run_without_permission(self, monkeypatch):
+        monkeypatch.setattr(Quartz, "CGEventTapCreate", lambda *a: None)
+        assert not locker.InputLocker().run()
+
+    def test_unlock_stops_own_run_loop(self, monkeypatch):
+        stopped = []
+        monkeypatch.setattr(Quartz, "CFRunLoopStop", stopped.append)
+        eng = locker.InputLocker()
+        eng.locked = True
+        eng.run_loop = "tap-loop"
+        eng.unlock()
+        assert stopped == ["tap-loop"]
+
+
+class TestCliEntryPoint:
+
+    def test_exits_when_tap_fails(self, monkeypatch, capsys):
+        monkeypatch.setattr(cli, "load_config", lambda: {"unlock_keys": ["x", "c"]})
+        monkeypatch.setattr(locker.InputLocker, "run", lambda self: False)
+        with pytest.raises(SystemExit):
+            cli.main(["--backend", "quartz"])
+        assert "Accessibility" in capsys.readouterr().err
+
+    def test_cli_import_stays_lean(self):
+        """The CLI must never pull in Qt, asyncio or the optional writers."""
+        code = textwrap.dedent(f"""
+            import importlib.util, itertools, sys, types
+            quartz = types.ModuleType("Quartz")
+            quartz.__getattr__ = lambda name, _n=itertools.count(1): next(_n)
+            sys.modules["Quartz"] = quartz
+            sys.path.insert(0, {PROJECT_ROOT!r})
+            spec = importlib.util.spec_from_file_location(
+                "cli", {os.path.join(PROJECT_ROOT, "macos-lock.py")!r})
+            spec.loader.exec_module(importlib.util.module_from_spec(spec))
+            heavy = [m for m in ("PyQt6", "asyncio", "argparse", "macos_lock.api",
+                                 "macos_lock.events", "macos_lock.audit")
+                     if m in sys.modules]
+            print(",".join(heavy))
+        """)
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                             text=True, check=True).stdout.strip()
+        assert out == ""
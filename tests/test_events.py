@@ -0,0 +1,241 @@
+"""Tests for the JSON-lines event stream and its CLI wiring."""
+
+import io
+import json
+import os
+import time
+
+import pytest
+import Quartz
+
+import macos_lock_cli as cli
+from macos_lock import locker as engine
+from macos_lock.events import EventStream
+
+
+class SlowSink(io.StringIO):
+    """A reader that takes its time - like a stalled pipe consumer."""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        time.sleep(self.delay)
+        return super().write(data)
+
+
+def _records(text):
+    return [json.loads(line) for line in text.splitlines() if line]
+
+
+@pytest.fixture
+def locker(monkeypatch):
+    locker = engine.InputLocker([7, 8])
+    locker.locked = True
+    locker.tap = object()
+    monkeypatch.setattr(Quartz, "CGEventTapEnable", lambda tap, enable: None)
+    return locker
+
+
+def _stream(locker, sink, **kwargs):
+    stream = EventStream(sink, counts=locker.blocked_counts,
+                         type_names=engine.EVENT_NAMES, **kwargs)
+    locker.listeners.append(stream.listener)
+    return stream
+
+
+class TestEventStream:
+
+    def test_records_are_json_lines(self):
+        sink = io.StringIO()
+        stream = EventStream(sink, flush_interval=0.01)
+        stream.start()
+        stream.emit("lock_started", unlock_keycodes=[7, 8])
+        stream.stop()
+        (record,) = _records(sink.getvalue())
+        assert record["event"] == "lock_started"
+        assert record["unlock_keycodes"] == [7, 8]
+        assert isinstance(record["ts"], float)
+
+    def test_summary_reports_deltas_by_name(self):
+        counts = {5: 0, 22: 0}
+        sink = io.StringIO()
+        stream = EventStream(sink, counts=counts, type_names={5: "mouse_moved"},
+                             flush_interval=0.01, summary_interval=0)
+        stream.start()
+        counts[5] += 3
+        time.sleep(0.05)
+        counts[5] += 2
+        counts[22] += 1
+        stream.stop()
+        summaries = [r for r in _records(sink.getvalue())
+                     if r["event"] == "blocked_summary"]
+        assert sum(s["blocked"].get("mouse_moved", 0) for s in summaries) == 5
+        assert sum(s["blocked"].get("22", 0) for s in summaries) == 1
+        assert sum(s["total"] for s in summaries) == 6
+
+    def test_no_summary_when_idle(self):
+        sink = io.StringIO()
+        stream = EventStream(sink, counts={5: 0}, flush_interval=0.01,
+                             summary_interval=0)
+        stream.start()
+        time.sleep(0.05)
+        stream.stop()
+        assert sink.getvalue() == ""
+
+    def test_pending_queue_is_bounded(self):
+        stream = EventStream(max_pending=10)
+        for i in range(25):
+            stream.emit("x", i=i)
+        assert len(stream._pending) == 10
+        assert stream.dropped == 15
+        assert stream._pending[0]["i"] == 15
+
+    def test_fifo_target(self, tmp_path):
+        if not hasattr(os, "mkfifo"):
+            pytest.skip("no FIFOs on this platform")
+        fifo = str(tmp_path / "events")
+        os.mkfifo(fifo)
+        stream = EventStream(fifo, flush_interval=0.01).start()
+        stream.emit("lock_started")
+        with open(fifo) as reader:
+            line = reader.readline()
+            stream.stop()
+        assert json.loads(line)["event"] == "lock_started"
+
+
+class TestLockerEvents:
+
+    def test_chord_emits_unlock_matched(self, locker, monkeypatch):
+        events = []
+        locker.listeners.append(lambda kind, fields: events.append((kind, fields)))
+        keycodes = iter([7, 8])
+        monkeypatch.setattr(Quartz, "CGEventGetIntegerValueField",
+                            lambda event, field: next(keycodes))
+        locker.event_callback(None, Quartz.kCGEventKeyDown, "e", None)
+        locker.event_callback(None, Quartz.kCGEventKeyDown, "e", None)
+        assert events == [
+            ("unlock_matched", {"reason": "chord"}),
+            ("unlocked", {"reason": "chord"}),
+        ]
+        assert locker.blocked_counts[Quartz.kCGEventKeyDown] == 1
+
+    def test_tap_disabled_is_reenabled(self, locker, monkeypatch):
+        enabled = []
+        events = []
+        monkeypatch.setattr(Quartz, "CGEventTapEnable",
+                            lambda tap, enable: enabled.append(enable))
+        locker.listeners.append(lambda kind, fields: events.append(kind))
+        result = locker.event_callback(
+            None, Quartz.kCGEventTapDisabledByTimeout, "e", None
+        )
+        assert result == "e"
+        assert enabled == [True]
+        assert events == ["tap_reenabled"]
+
+    def test_blocked_events_counted(self, locker):
+        for _ in range(3):
+            assert locker.event_callback(None, Quartz.kCGEventMouseMoved, "e", None) is None
+        assert locker.blocked_counts[Quartz.kCGEventMouseMoved] == 3
+
+    def _storm(self, locker, n):
+        """Mouse moves through the tap while the reader takes 50 ms a write."""
+        sink = SlowSink(delay=0.05)
+        stream = _stream(locker, sink, flush_interval=0.01, summary_interval=0.01)
+        stream.start()
+        stream.emit("lock_started")
+        callback = locker.event_callback
+        moved = Quartz.kCGEventMouseMoved
+        start = time.perf_counter()
+        for _ in range(n):
+            callback(None, moved, None, None)
+        elapsed = time.perf_counter() - start
+        stream.stop()
+        return sink, stream, elapsed
+
+    def test_mouse_storm_is_aggregated(self, locker):
+        n = 200_000
+        sink, stream, _ = self._storm(locker, n)
+        # Mouse moves are aggregated, not queued one record per event.
+        records = _records(sink.getvalue())
+        assert len(records) < 100
+        total = sum(r["total"] for r in records if r["event"] == "blocked_summary")
+        assert total == n
+        assert sink.writes == stream.batches
+
+    @pytest.mark.timing
+    def test_mouse_storm_never_back_pressures_tap(self, locker):
+        """A stalled reader must not slow the callback down."""
+        n = 200_000
+        _, _, elapsed = self._storm(locker, n)
+        # Throughput of the tap path is independent of the 50 ms writes.
+        rate = n / elapsed
+        assert rate > 100_000, f"only {rate:.0f} events/s through the tap"
+
+    def _flood(self, n):
+        stream = EventStream(SlowSink(delay=1.0), max_pending=1000,
+                             flush_interval=0.01).start()
+        start = time.perf_counter()
+        for _ in range(n):
+            stream.emit("tap_reenabled")
+        elapsed = time.perf_counter() - start
+        stream._stop.set()
+        return stream, elapsed
+
+    def test_stalled_writer_drops_instead_of_queueing(self):
+        n = 50_000
+        stream, _ = self._flood(n)
+        # The writer may have taken one batch before stalling on the sink.
+        assert len(stream._pending) <= 1000
+        assert stream.dropped > n // 2
+
+    @pytest.mark.timing
+    def test_emit_cost_is_constant_with_stalled_writer(self):
+        n = 50_000
+        _, elapsed = self._flood(n)
+        assert elapsed / n < 20e-6, elapsed / n
+
+
+class TestCliArgs:
+
+    def test_events_default_off(self):
+        args = cli.parse_args([])
+        assert args.events is None
+        assert args.events_file == "-"
+
+    def test_events_jsonl(self):
+        args = cli.parse_args(["--events", "jsonl", "--events-file", "/tmp/fifo"])
+        assert args.events == "jsonl"
+        assert args.events_file == "/tmp/fifo"
+
+    def test_unknown_format_rejected(self):
+        with pytest.raises(SystemExit):
+            cli.parse_args(["--events", "xml"])
+
+
+class TestCliErrors:
+
+    def test_errors_stay_out_of_event_stream(self, monkeypatch, capsys):
+        monkeypatch.setattr(cli, "load_config", lambda: {"unlock_keys": ["x", "c"]})
+        monkeypatch.setattr(engine.InputLocker, "run", lambda self: False)
+        with pytest.raises(SystemExit):
+            cli.main(["--backend", "quartz", "--events", "jsonl"])
+        out, err = capsys.readouterr()
+        for line in out.splitlines():
+            json.loads(line)
+        assert "Could not create Event Tap" in err
+
+    def test_setup_error_on_stderr(self, monkeypatch, capsys):
+        def fail(self):
+            raise RuntimeError("no X display")
+
+        monkeypatch.setattr(cli, "load_config", lambda: {"unlock_keys": ["x", "c"]})
+        monkeypatch.setattr(engine.InputLocker, "run", fail)
+        with pytest.raises(SystemExit):
+            cli.main(["--backend", "quartz", "--events", "jsonl"])
+        out, err = capsys.readouterr()
+        assert "no X display" not in out
+        assert "Error: no X display" in err
@@ -0,0 +1,128 @@
+"""Tests for hold-to-unlock, driven by replayed traces with synthetic timestamps."""
+
+import pytest
+
+from macos_lock.chord import ChordLocker
+from macos_lock.locker import InputLocker
+from tests.helpers import DOWN, MOVE, MS, UP, TraceEvent, per_event, replay
+
+
+def held_chord(hold_for_ms, repeat_every_ms=50):
+    """X down, C down, then C auto-repeat until ``hold_for_ms``, then release."""
+    trace = [(DOWN, 7, 0), (DOWN, 8, 10)]
+    t = 10 + 500  # initial key repeat delay
+    while t <= 10 + hold_for_ms:
+        trace.append((DOWN, 8, t))
+        t += repeat_every_ms
+    trace += [(UP, 8, 10 + hold_for_ms), (UP, 7, 10 + hold_for_ms)]
+    return trace
+
+
+class TestHoldMatching:
+
+    def test_immediate_without_hold(self, trace_quartz):
+        assert replay(InputLocker([7, 8]), [(DOWN, 7, 0), (DOWN, 8, 1)]) == 1
+
+    def test_brush_does_not_unlock(self, trace_quartz):
+        locker = InputLocker([7, 8], hold_ms=800)
+        trace = [(DOWN, 7, 0), (DOWN, 8, 20), (UP, 8, 90), (UP, 7, 100)]
+        assert replay(locker, trace) is None
+        assert locker.locked
+
+    def test_held_chord_unlocks_on_repeat(self, trace_quartz):
+        locker = InputLocker([7, 8], hold_ms=800)
+        index = replay(locker, held_chord(1500))
+        assert index is not None
+        event_type, keycode, ms = held_chord(1500)[index]
+        assert (event_type, keycode) == (DOWN, 8)
+        assert ms - 10 >= 800
+        assert ms - 10 < 800 + 50
+
+    def test_released_too_early(self, trace_quartz):
+        locker = InputLocker([7, 8], hold_ms=800)
+        assert replay(locker, held_chord(700)) is None
+
+    def test_release_resets_hold(self, trace_quartz):
+        locker = InputLocker([7, 8], hold_ms=500)
+        trace = [
+            (DOWN, 7, 0), (DOWN, 8, 0), (DOWN, 8, 400),
+            (UP, 8, 450),                       # released before 500 ms
+            (DOWN, 8, 460), (DOWN, 8, 900),     # new hold started at 460
+            (DOWN, 8, 961),
+        ]
+        assert replay(locker, trace) == 6
+
+    def test_non_key_event_completes_hold(self, trace_quartz):
+        """Key repeat off: any later event carries the timestamp."""
+        locker = InputLocker([7, 8], hold_ms=300)
+        trace = [(DOWN, 7, 0), (DOWN, 8, 5), (MOVE, 0, 200), (MOVE, 0, 306)]
+        assert replay(locker, trace) == 3
+
+    def test_completing_event_stays_blocked(self, trace_quartz):
+        locker = InputLocker([7, 8], hold_ms=300)
+        locker.locked = True
+        for keycode, ms in ((7, 0), (8, 5)):
+            locker.event_callback(None, DOWN, TraceEvent(keycode, ms * MS), None)
+        assert locker.event_callback(None, MOVE, TraceEvent(0, 400 * MS), None) is None
+        assert not locker.locked
+
+    def test_extra_key_during_hold_restarts_it(self, trace_quartz):
+        locker = InputLocker([7, 8], hold_ms=300)
+        trace = [(DOWN, 7, 0), (DOWN, 8, 0), (DOWN, 0, 100), (UP, 0, 150),
+                 (DOWN, 8, 310), (DOWN, 8, 620)]
+        assert replay(locker, trace) == 5
+
+    def test_extra_key_held_through_hold(self, trace_quartz):
+        locker = InputLocker([7, 8], hold_ms=500)
+        trace = [(DOWN, 7, 0), (DOWN, 8, 10), (DOWN, 0, 100), (DOWN, 1, 200),
+                 (DOWN, 8, 600), (MOVE, 0, 700), (DOWN, 8, 1200)]
+        assert replay(locker, trace) is None
+        assert locker._tokens < locker.attempt_burst - 1  # two attempts, minus refill
+
+    def test_replay_is_deterministic(self, trace_quartz):
+        trace = held_chord(1200, repeat_every_ms=33)
+        results = {replay(InputLocker([7, 8], hold_ms=750), trace) for _ in range(20)}
+        assert len(results) == 1
+
+    def test_matcher_without_backend(self):
+        matcher = ChordLocker([1, 2], hold_ms=100)
+        assert not matcher.key_down(1, 0)
+        assert not matcher.key_down(2, 10 * MS)
+        assert not matcher.key_down(2, 100 * MS)
+        assert matcher.key_down(2, 110 * MS)
+
+    def test_set_hold_ms(self):
+        matcher = ChordLocker([1, 2])
+        matcher.set_hold_ms(250)
+        assert matcher.hold_ns == 250 * MS
+
+
+@pytest.mark.timing
+class TestHoldCost:
+    """The hold path must stay in the same cost class as the immediate one."""
+
+    N = 20_000
+
+    def _storm(self):
+        # Chord never completes: key 7 held, 8 never pressed, mixed with moves.
+        events = [(DOWN, TraceEvent(7, 0))]
+        for i in range(self.N):
+            events.append((DOWN, TraceEvent(7, i * MS)))
+            events.append((MOVE, TraceEvent(0, i * MS)))
+        return events
+
+    def test_hot_path_cost(self, trace_quartz):
+        events = self._storm()
+        immediate = per_event(InputLocker([7, 8]), events, 5, reset=True)
+        hold = per_event(InputLocker([7, 8], hold_ms=500), events, 5, reset=True)
+        assert hold < immediate * 1.5 + 200e-9, (immediate, hold)
+
+    def test_pending_hold_cost(self, trace_quartz):
+        # Chord held (hold pending) while a mouse storm checks timestamps.
+        events = [(DOWN, TraceEvent(7, 0)), (DOWN, TraceEvent(8, 0))]
+        events += [(MOVE, TraceEvent(0, i)) for i in range(self.N)]
+        pending = per_event(InputLocker([7, 8], hold_ms=10_000), events, 5,
+                            reset=True)
+        idle = per_event(InputLocker([7, 8]),
+                         [(MOVE, TraceEvent(0, i)) for i in range(self.N)], 5, reset=True)
+        assert pending < idle * 3 + 500e-9, (idle, pending)
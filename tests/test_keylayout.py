@@ -0,0 +1,170 @@
+"""Tests for the layout-aware keycode table, with fake layout providers."""
+
+import json
+
+import pytest
+
+from macos_lock import config, keylayout, keymap
+from macos_lock.chord import ChordLocker
+from macos_lock.keylayout import FIXED_KEYS, KeyLayout, generate
+
+# German QWERTZ differs from US-ANSI on these keys (unshifted output).
+GERMAN = {6: "y", 16: "z", 27: "ß", 24: "´", 33: "ü", 39: "ä", 41: "ö",
+          30: "+", 42: "#", 43: ",", 44: "-", 47: ".", 50: "^", 10: "<"}
+FRENCH = {0: "q", 12: "a", 13: "z", 6: "w", 46: ",", 18: "&"}
+
+
+class FakeProvider:
+    def __init__(self, layout_id, overrides):
+        self.id = layout_id
+        self.overrides = overrides
+        self.queries = 0
+
+    def layout_id(self):
+        return self.id
+
+    def character(self, keycode):
+        self.queries += 1
+        if keycode in self.overrides:
+            return self.overrides[keycode]
+        return keymap.keycode_name(keycode)
+
+
+class NoQueries(FakeProvider):
+    def character(self, keycode):
+        raise AssertionError("layout queried although the table is cached")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return str(tmp_path / "keylayout.json")
+
+
+class TestGenerate:
+
+    def test_german_names_follow_layout(self):
+        names = generate(FakeProvider("de", GERMAN))
+        assert names[6] == "y"
+        assert names[16] == "z"
+        assert names[41] == "ö"
+        assert names[10] == "<"
+
+    def test_fixed_keys_present(self):
+        names = generate(FakeProvider("de", GERMAN))
+        for keycode, name in FIXED_KEYS.items():
+            assert names[keycode] == name
+        assert {"f1", "f12", "left", "up", "kp_0", "kp_enter"} <= set(names)
+
+    def test_dead_keys_and_duplicates_get_stable_names(self):
+        names = generate(FakeProvider("x", {24: "", 27: "a"}))
+        assert names[24] == "key_24"
+        assert names[27] == "key_27"   # "a" already names keycode 0
+
+    def test_names_unique(self):
+        names = [n for n in generate(FakeProvider("fr", FRENCH)) if n]
+        assert len(names) == len(set(names))
+
+    def test_without_provider_us_table(self):
+        layout = KeyLayout()
+        for name, code in keymap.KEYCODE_MAP.items():
+            assert layout.keycode_name(code) == name
+        assert layout.keys_to_keycodes(["x", "c", "f5"]) == [7, 8, 96]
+
+
+class TestKeyLayout:
+
+    def test_lookup_by_layout(self, cache):
+        layout = KeyLayout(FakeProvider("de", GERMAN), cache)
+        assert layout.keys_to_keycodes(["z", "ö"]) == [16, 41]
+        assert layout.keycode_name(6) == "y"
+        assert layout.keycode_name(500) is None
+
+    def test_cached_on_disk_keyed_by_layout(self, cache):
+        KeyLayout(FakeProvider("de", GERMAN), cache).names()
+        KeyLayout(FakeProvider("fr", FRENCH), cache).names()
+        with open(cache) as f:
+            data = json.load(f)
+        assert set(data["layouts"]) == {"de", "fr"}
+        assert data["layouts"]["de"][16] == "z"
+
+    def test_later_start_loads_without_querying(self, cache):
+        KeyLayout(FakeProvider("de", GERMAN), cache).names()
+        layout = KeyLayout(NoQueries("de", {}), cache)
+        assert layout.keys_to_keycodes(["z"]) == [16]
+
+    def test_generated_once(self, cache):
+        provider = FakeProvider("de", GERMAN)
+        layout = KeyLayout(provider, cache)
+        layout.names()
+        queries = provider.queries
+        for keycode in range(128):
+            layout.keycode_name(keycode)
+        assert provider.queries == queries
+
+    def test_invalidate_on_input_source_change(self, cache):
+        provider = FakeProvider("com.apple.keylayout.US", {})
+        layout = KeyLayout(provider, cache)
+        assert layout.keys_to_keycodes(["z"]) == [6]
+        provider.id, provider.overrides = "com.apple.keylayout.German", GERMAN
+        assert layout.keys_to_keycodes(["z"]) == [6]   # still the loaded table
+        layout.invalidate(object())                    # notification callback
+        assert layout.keys_to_keycodes(["z"]) == [16]
+        assert layout.layout_id == "com.apple.keylayout.German"
+
+    def test_corrupt_cache_regenerated(self, cache):
+        with open(cache, "w") as f:
+            f.write("{not json")
+        layout = KeyLayout(FakeProvider("de", GERMAN), cache)
+        assert layout.keycode_name(16) == "z"
+        with open(cache) as f:
+            assert json.load(f)["version"] == keylayout.CACHE_VERSION
+
+    def test_unwritable_cache_still_works(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        layout = KeyLayout(FakeProvider("de", GERMAN), str(blocker / "keylayout.json"))
+        assert layout.keycode_name(6) == "y"
+
+    def test_unknown_layout_id_not_cached(self, cache):
+        layout = KeyLayout(FakeProvider(None, GERMAN), cache)
+        assert layout.keycode_name(16) == "z"
+        with pytest.raises(FileNotFoundError):
+            open(cache)
+
+    def test_watch_without_foundation(self, cache):
+        assert KeyLayout(FakeProvider("de", GERMAN), cache).watch() is None
+
+
+class TestCurrentLayout:
+
+    def test_module_functions_use_current_layout(self, monkeypatch, cache):
+        monkeypatch.setattr(keylayout, "_current", KeyLayout(FakeProvider("de", GERMAN), cache))
+        # What the settings dialog does with QKeyEvent.nativeVirtualKey().
+        assert keylayout.keycode_name(16) == "z"
+        assert keylayout.keys_to_keycodes(["z"]) == [16]
+
+    def test_partial_resolution_rejected(self, cache):
+        layout = KeyLayout(FakeProvider("de", GERMAN), cache)
+        assert layout.keys_to_keycodes(["z", "ö"]) == [16, 41]
+        assert layout.keys_to_keycodes(["z", "nope"]) == []
+
+    def test_chord_survives_layout_switch(self, monkeypatch, cache):
+        provider = FakeProvider("com.apple.keylayout.German", GERMAN)
+        layout = KeyLayout(provider, cache)
+        monkeypatch.setattr(keylayout, "_current", layout)
+        saved = {"unlock_keys": ["z", "ö"]}
+        assert config.unlock_keycodes(saved) == [16, 41]
+
+        provider.id, provider.overrides = "com.apple.keylayout.US", {}
+        layout.invalidate(object())
+        with pytest.warns(RuntimeWarning, match="default unlock keys"):
+            keycodes = config.unlock_keycodes(saved)
+        assert keycodes == [7, 8]   # the whole default chord, not just [6]
+        locker = ChordLocker(keycodes)
+        assert not locker.key_down(6, 0)
+
+    def test_default_is_us_off_macos(self, monkeypatch):
+        monkeypatch.setattr(keylayout, "_current", None)
+        monkeypatch.setattr(keylayout.sys, "platform", "linux")
+        assert keylayout.current_layout().provider is None
+        assert keylayout.keys_to_keycodes(["x", "c"]) == [7, 8]
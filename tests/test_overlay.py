@@ -0,0 +1,135 @@
+"""Tests for the multi-display lock overlay.
+
+conftest replaces PyQt6 with mocks, so the overlay runs in a subprocess on
+Qt's offscreen platform with two virtual screens. Skipped when PyQt6 is not
+installed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from macos_lock.config import DEFAULT_CONFIG
+
+SCREENS = {"screens": [
+    {"name": "builtin", "x": 0, "y": 0, "width": 1440, "height": 900,
+     "logicalDpi": 96, "logicalBaseDpi": 96, "dpr": 2},
+    {"name": "external", "x": 1440, "y": 0, "width": 1920, "height": 1080,
+     "logicalDpi": 96, "logicalBaseDpi": 96, "dpr": 1},
+]}
+
+SCRIPT = r"""
+import json, sys, time
+try:
+    from PyQt6.QtWidgets import QApplication
+except ImportError:
+    sys.exit(77)
+from macos_lock.overlay import OverlayManager
+
+app = QApplication([])
+counts = {"key_down": 0, "mouse_moved": 0}
+manager = OverlayManager(counts)
+
+def settle():
+    for _ in range(5):
+        app.processEvents()
+
+result = {"screens": len(app.screens()), "displays": []}
+ids = None
+for lock in range(3):
+    manager.show("Press X + C to unlock")
+    settle()
+    for tick in range(20):
+        counts["mouse_moved"] += 7
+        manager._tick()
+        settle()
+    current = sorted(id(o) for o in manager.overlays.values())
+    result.setdefault("reused", True)
+    result["reused"] &= ids is None or ids == current
+    ids = current
+    manager.hide()
+    settle()
+
+# Unchanged count: the timer tick must not schedule a repaint.
+manager.show("Press X + C to unlock")
+settle()
+updates = []
+for overlay in manager.overlays.values():
+    overlay.update = lambda *a, _u=updates: _u.append(a)
+manager._tick()
+manager._tick()
+result["idle_updates"] = len(updates)
+for overlay in manager.overlays.values():
+    del overlay.update
+
+N = 50
+for overlay in manager.overlays.values():
+    counter = overlay.counter_rect()
+    start = time.perf_counter()
+    for i in range(N):
+        overlay.count = i
+        overlay.repaint(counter)
+    partial = (time.perf_counter() - start) / N
+    start = time.perf_counter()
+    for _ in range(N):
+        overlay.repaint()
+    full = (time.perf_counter() - start) / N
+    result["displays"].append({
+        "size": [overlay.width(), overlay.height()],
+        "dpr": overlay.devicePixelRatioF(),
+        "renders": overlay.renders,
+        "count": overlay.count,
+        "background_bytes": overlay.background_bytes(),
+        "counter_repaint_us": partial * 1e6,
+        "full_repaint_us": full * 1e6,
+    })
+manager.hide()
+print(json.dumps(result))
+"""
+
+
+@pytest.fixture(scope="module")
+def measured(tmp_path_factory):
+    config = tmp_path_factory.mktemp("qt") / "screens.json"
+    config.write_text(json.dumps(SCREENS))
+    env = dict(os.environ, QT_QPA_PLATFORM=f"offscreen:configfile={config}")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, "-c", SCRIPT], cwd=root, env=env,
+                          capture_output=True, text=True, timeout=60)
+    if proc.returncode == 77:
+        pytest.skip("PyQt6 not installed")
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+class TestOverlay:
+
+    def test_one_overlay_per_screen(self, measured):
+        assert measured["screens"] == 2
+        assert len(measured["displays"]) == 2
+
+    def test_overlays_reused_across_locks(self, measured):
+        assert measured["reused"]
+
+    def test_background_rendered_once_per_screen(self, measured):
+        assert [d["renders"] for d in measured["displays"]] == [1, 1]
+
+    def test_background_memory_per_display(self, measured):
+        for display in measured["displays"]:
+            width, height = display["size"]
+            pixels = round(width * display["dpr"]) * round(height * display["dpr"])
+            assert display["background_bytes"] == pixels * 4
+
+    @pytest.mark.timing
+    def test_counter_repaint_cheaper_than_full(self, measured):
+        for display in measured["displays"]:
+            assert display["counter_repaint_us"] < display["full_repaint_us"], display
+
+    def test_unchanged_count_does_not_repaint(self, measured):
+        assert measured["idle_updates"] == 0
+
+    def test_overlay_off_by_default(self):
+        assert DEFAULT_CONFIG["show_overlay"] is False
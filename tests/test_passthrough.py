@@ -0,0 +1,159 @@
+"""Tests for the passthrough allowlist, with a stand-in process provider."""
+
+import pytest
+import Quartz
+
+from macos_lock.locker import InputLocker
+from macos_lock.passthrough import PidIndex, pid_index
+from tests.helpers import DOWN, MOVE, MS, per_event
+
+REMOTE = "com.example.remote-support"
+MDM = "com.example.mdm-agent"
+
+
+class PidEvent:
+    __slots__ = ("keycode", "timestamp", "pid")
+
+    def __init__(self, keycode, timestamp, pid=0):
+        self.keycode = keycode
+        self.timestamp = timestamp
+        self.pid = pid
+
+
+class FakeProcesses:
+    def __init__(self, running):
+        self.processes = list(running)
+        self.calls = 0
+
+    def running(self):
+        self.calls += 1
+        return iter(self.processes)
+
+
+@pytest.fixture
+def pid_quartz(monkeypatch):
+    """Like ``trace_quartz``, plus the posting PID from PidEvent."""
+    reads = []
+
+    def field(event, name):
+        if name == Quartz.kCGEventSourceUnixProcessID:
+            reads.append(event.pid)
+            return event.pid
+        return event.keycode
+
+    monkeypatch.setattr(Quartz, "CGEventGetIntegerValueField", field)
+    monkeypatch.setattr(Quartz, "CGEventGetTimestamp", lambda event: event.timestamp)
+    monkeypatch.setattr(Quartz, "CGEventTapEnable", lambda tap, enable: None)
+    return reads
+
+
+def allowlisted_locker(processes, apps=(REMOTE, MDM)):
+    locker = InputLocker([7, 8], passthrough_apps=apps)
+    locker.passthrough.provider = processes
+    locker.run()  # the Quartz mock's run loop returns at once
+    locker.locked = True
+    return locker
+
+
+class TestPidIndex:
+
+    def test_refresh_resolves_bundle_ids(self):
+        index = PidIndex([REMOTE], FakeProcesses([(100, REMOTE), (200, "com.other")]))
+        index.refresh()
+        assert index.pids == {100}
+
+    def test_launch_and_terminate(self):
+        index = PidIndex([REMOTE, MDM], FakeProcesses([]))
+        index.refresh()
+        index.launched(300, MDM)
+        index.launched(301, "com.other")
+        assert index.pids == {300}
+        index.terminated(300)
+        index.terminated(999)
+        assert index.pids == frozenset()
+
+    def test_without_provider_nothing_runs(self):
+        index = PidIndex([REMOTE])
+        index.refresh()
+        assert index.pids == frozenset()
+
+    def test_watch_without_appkit(self):
+        assert PidIndex([REMOTE]).watch() is False
+
+    def test_empty_allowlist_has_no_index(self):
+        assert pid_index([]) is None
+        assert InputLocker([7, 8]).passthrough is None
+
+
+class TestCallback:
+
+    def test_allowed_app_input_passes(self, pid_quartz):
+        locker = allowlisted_locker(FakeProcesses([(100, REMOTE)]))
+        event = PidEvent(0, 0, pid=100)
+        assert locker.event_callback(None, MOVE, event, None) is event
+        assert locker.event_callback(None, DOWN, event, None) is event
+        assert locker.blocked_counts[MOVE] == 0
+        assert not locker.pressed_keys  # not local typing, not chord input
+
+    def test_local_input_still_blocked(self, pid_quartz):
+        locker = allowlisted_locker(FakeProcesses([(100, REMOTE)]))
+        assert locker.event_callback(None, MOVE, PidEvent(0, 0), None) is None
+        assert locker.event_callback(None, MOVE, PidEvent(0, 0, pid=555), None) is None
+        assert locker.blocked_counts[MOVE] == 2
+
+    def test_index_built_at_lock_not_per_event(self, pid_quartz):
+        processes = FakeProcesses([(100, REMOTE)])
+        locker = allowlisted_locker(processes)
+        assert processes.calls == 1
+        for i in range(1000):
+            locker.event_callback(None, MOVE, PidEvent(0, i * MS, pid=100), None)
+        assert processes.calls == 1
+
+    def test_app_launched_while_locked(self, pid_quartz):
+        locker = allowlisted_locker(FakeProcesses([]))
+        event = PidEvent(0, 0, pid=400)
+        assert locker.event_callback(None, MOVE, event, None) is None
+        locker.passthrough.launched(400, MDM)   # NSWorkspace notification
+        assert locker.event_callback(None, MOVE, event, None) is event
+        locker.passthrough.terminated(400)
+        assert locker.event_callback(None, MOVE, event, None) is None
+
+    def test_chord_still_unlocks(self, pid_quartz):
+        locker = allowlisted_locker(FakeProcesses([(100, REMOTE)]))
+        locker.event_callback(None, DOWN, PidEvent(7, 0), None)
+        locker.event_callback(None, DOWN, PidEvent(8, MS), None)
+        assert not locker.locked
+
+    def test_no_allowlist_never_reads_pid(self, pid_quartz):
+        locker = InputLocker([7, 8])
+        locker.locked = True
+        locker.event_callback(None, MOVE, PidEvent(0, 0, pid=100), None)
+        assert pid_quartz == []
+
+    def test_from_config(self):
+        locker = InputLocker.from_config({"unlock_keys": ["x", "c"],
+                                          "passthrough_apps": [REMOTE]})
+        assert locker.passthrough.bundle_ids == {REMOTE}
+
+
+@pytest.mark.timing
+class TestLookupCost:
+    """One set lookup per event, independent of how many PIDs are allowed."""
+
+    N = 50_000
+
+    def _storm(self, pid):
+        return [(MOVE, PidEvent(0, i * MS, pid)) for i in range(self.N)]
+
+    def test_storm_cost(self, pid_quartz):
+        plain = InputLocker([7, 8])
+        plain.locked = True
+        few = allowlisted_locker(FakeProcesses([(100, REMOTE)]))
+        many = allowlisted_locker(FakeProcesses(
+            [(1000 + i, REMOTE) for i in range(5000)]))
+        assert len(many.passthrough.pids) == 5000
+        off = per_event(plain, self._storm(555), 3)
+        one = per_event(few, self._storm(555), 3)
+        large = per_event(many, self._storm(555), 3)
+        assert one < off * 2 + 500e-9, (off, one)
+        assert large < one * 1.5 + 100e-9, (one, large)
@@ -0,0 +1,215 @@
+"""Tests for the on-demand sampling profiler, benchmarked under the Quartz mock."""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from macos_lock import profiler
+from macos_lock.locker import InputLocker
+from macos_lock.profiler import SamplingProfiler
+from tests.helpers import MOVE, TraceEvent
+
+
+def read_folded(path):
+    stacks = {}
+    with open(path) as f:
+        for line in f:
+            stack, count = line.rsplit(" ", 1)
+            stacks[stack] = int(count)
+    return stacks
+
+
+class TapStorm:
+    """Runs the locker callback in a thread named like the tap thread."""
+
+    def __init__(self, locker, seconds):
+        self.locker = locker
+        self.seconds = seconds
+        self.events = 0
+        self.elapsed = 0.0
+
+    def run(self):
+        callback = self.locker.event_callback
+        event = TraceEvent(0, 0)
+        self.locker.locked = True
+        start = time.perf_counter()
+        end = start + self.seconds
+        while time.perf_counter() < end:
+            for _ in range(1000):
+                callback(None, MOVE, event, None)
+            self.events += 1000
+        self.elapsed = time.perf_counter() - start
+
+    def thread(self):
+        return threading.Thread(target=self.run, name="macos-lock-tap")
+
+    def per_event(self):
+        return self.elapsed / self.events
+
+
+class TestSampling:
+
+    def test_collapsed_stacks_of_tap_thread(self, tmp_path, trace_quartz):
+        path = str(tmp_path / "tap.folded")
+        storm = TapStorm(InputLocker([7, 8]), 0.3)
+        prof = SamplingProfiler(path, rate_hz=200).start()
+        thread = storm.thread()
+        thread.start()
+        thread.join()
+        assert prof.stop() == path
+        stacks = read_folded(path)
+        tap = {s: c for s, c in stacks.items() if s.startswith("macos-lock-tap;")}
+        assert tap
+        # Samples land on GIL switch points, so the innermost frame varies.
+        assert all(";run (test_profiler.py:" in s for s in tap)
+        assert sum(stacks.values()) >= 10
+        assert not any(s.startswith("macos-lock-profiler") for s in stacks)
+
+    def test_distinct_stacks_bounded(self, tmp_path):
+        prof = SamplingProfiler(str(tmp_path / "p.folded"), max_stacks=1,
+                                threads=["MainThread"])
+        prof.sample()
+
+        def elsewhere():
+            prof.sample()
+
+        elsewhere()
+        assert len(prof.samples) == 2
+        assert prof.samples["MainThread;[truncated]"] == 1
+
+    def test_unmatched_threads_ignored(self, tmp_path):
+        prof = SamplingProfiler(str(tmp_path / "p.folded"), threads=["nope"])
+        prof.sample()
+        assert not prof.samples
+
+
+class TestActivation:
+
+    def test_off_by_default(self):
+        prof = profiler.install(environ={})
+        assert not prof.running
+
+    def test_env_var_starts(self, tmp_path):
+        path = str(tmp_path / "env.folded")
+        prof = profiler.install(environ={"MACOS_LOCK_PROFILE": path,
+                                         "MACOS_LOCK_PROFILE_HZ": "500"})
+        assert prof.running
+        assert prof.interval == pytest.approx(0.002)
+        time.sleep(0.05)
+        assert prof.stop() == path
+        assert os.path.exists(path)
+
+    @pytest.mark.parametrize("value", ["fast", "0", "-5", "nan", "inf"])
+    def test_bad_rate_falls_back(self, value):
+        with pytest.warns(RuntimeWarning, match="MACOS_LOCK_PROFILE_HZ"):
+            prof = profiler.install(environ={"MACOS_LOCK_PROFILE_HZ": value})
+        assert prof.interval == pytest.approx(1.0 / profiler.RATE_HZ)
+        assert not prof.running
+
+    def test_sigusr1_toggles(self, tmp_path):
+        path = str(tmp_path / "sig.folded")
+        prof = profiler.install(environ={"MACOS_LOCK_PROFILE": ""})
+        prof.path = path
+        os.kill(os.getpid(), signal.SIGUSR1)
+        time.sleep(0.05)
+        assert prof.running
+        os.kill(os.getpid(), signal.SIGUSR1)
+        prof._thread.join(2)
+        assert not prof.running
+        assert prof.written == path
+        assert any(s.startswith("MainThread;") for s in read_folded(path))
+
+    def test_signal_handled_off_the_main_thread(self):
+        # The CLI's main thread sits in CFRunLoopRun and cannot run handlers.
+        prof = profiler.install(environ={})
+        toggled = threading.Event()
+        threads = []
+        prof.toggle = lambda: (threads.append(threading.current_thread().name),
+                               toggled.set())
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert toggled.wait(2)
+        assert threads == ["macos-lock-signals"]
+
+
+GUI_SIGNAL_SCRIPT = r"""
+import sys
+try:
+    from PyQt6.QtWidgets import QApplication
+except ImportError:
+    sys.exit(77)
+import signal
+from PyQt6.QtCore import QTimer
+from benchmarks import fake_quartz, footprint
+sys.modules["Quartz"] = fake_quartz
+gui = footprint._load_script("macos_lock_gui", "macos-lock-gui.py")
+
+app = QApplication([])
+gui.wake_on_signals(app)
+signal.signal(signal.SIGUSR1, lambda signum, frame: app.exit(7))
+QTimer.singleShot(5000, lambda: app.exit(1))
+QTimer.singleShot(0, lambda: print("ready", flush=True))
+sys.exit(app.exec())
+"""
+
+
+class TestGuiSignals:
+
+    def test_signal_reaches_python_while_qt_sleeps(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=root)
+        proc = subprocess.Popen([sys.executable, "-c", GUI_SIGNAL_SCRIPT], cwd=root,
+                                env=env, stdout=subprocess.PIPE, text=True)
+        try:
+            if proc.stdout.readline().strip() != "ready":
+                if proc.wait(10) == 77:
+                    pytest.skip("PyQt6 not installed")
+                pytest.fail("GUI helper did not start")
+            time.sleep(0.2)  # let Qt go idle
+            start = time.monotonic()
+            os.kill(proc.pid, signal.SIGUSR1)
+            assert proc.wait(10) == 7
+            # Handled on arrival, not at the 5 s fallback.
+            assert time.monotonic() - start < 2
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+class TestOverhead:
+    """Bounded cost when enabled; the disabled path has no code on it."""
+
+    SECONDS = 0.25
+
+    def _storm(self, prof=None):
+        storm = TapStorm(InputLocker([7, 8]), self.SECONDS)
+        if prof is not None:
+            prof.start()
+        thread = storm.thread()
+        thread.start()
+        thread.join()
+        if prof is not None:
+            prof.stop()
+        return storm.per_event()
+
+    @pytest.mark.timing
+    def test_enabled_overhead_bounded(self, tmp_path, trace_quartz):
+        prof = SamplingProfiler(str(tmp_path / "o.folded"), rate_hz=100)
+        baseline = profiled = float("inf")
+        for _ in range(3):  # interleaved, best of three
+            baseline = min(baseline, self._storm())
+            profiled = min(profiled, self._storm(prof))
+        per_sample = prof.sample_time / prof.sample_count
+        assert per_sample < 1e-3, per_sample
+        assert profiled < baseline * 1.5 + 100e-9, (baseline, profiled)
+
+    def test_disabled_only_parks_signal_thread(self):
+        profiler.install(environ={})
+        names = [t.name for t in threading.enumerate()]
+        assert "macos-lock-profiler" not in names
+        assert names.count("macos-lock-signals") == 1
+        assert signal.SIGUSR1 in signal.pthread_sigmask(signal.SIG_BLOCK, [])
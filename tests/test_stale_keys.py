@@ -0,0 +1,193 @@
+"""Tests for stale pressed-key reconciliation (replayed traces with lost KeyUps)."""
+
+import sys
+import types
+
+import pytest
+import Quartz
+
+from macos_lock.chord import ChordLocker
+from macos_lock.locker import InputLocker
+from macos_lock.x11 import KEY_PRESS, X11InputLocker
+from tests.helpers import (
+    DOWN, MOVE, MS, UP, TraceEvent, per_event, recorder, replay,
+)
+
+SECOND = 1000  # ms
+DISABLED = Quartz.kCGEventTapDisabledByTimeout
+
+
+@pytest.fixture
+def hardware(monkeypatch):
+    """Keys the HID system reports as physically down."""
+    held = set()
+    monkeypatch.setattr(Quartz, "CGEventSourceKeyState", lambda state, key: key in held)
+    return held
+
+
+class TestDroppedKeyUp:
+
+    def test_phantom_key_does_not_complete_chord(self, trace_quartz, hardware):
+        # X's KeyUp was lost across sleep; a minute later C alone is pressed.
+        locker = InputLocker([7, 8])
+        events = recorder(locker)
+        trace = [(DOWN, 7, 0), (MOVE, 0, 30 * SECOND), (DOWN, 8, 60 * SECOND)]
+        assert replay(locker, trace) is None
+        assert locker.locked
+        assert 7 not in locker.pressed_keys
+        assert ("stale_keys", {"keycodes": [7], "cause": "expired"}) in events
+
+    def test_long_held_key_confirmed_by_hardware(self, trace_quartz, hardware):
+        hardware.add(7)
+        locker = InputLocker([7, 8])
+        assert replay(locker, [(DOWN, 7, 0), (DOWN, 8, 60 * SECOND)]) == 1
+
+    def test_real_chord_after_phantom(self, trace_quartz, hardware):
+        locker = InputLocker([7, 8])
+        trace = [(DOWN, 8, 0),                             # KeyUp for C lost
+                 (DOWN, 7, 60 * SECOND),                   # C stale: dropped
+                 (DOWN, 8, 60 * SECOND + 40)]              # real chord
+        assert replay(locker, trace) == 2
+
+    def test_fresh_keys_skip_hardware_check(self, trace_quartz, monkeypatch):
+        def fail(state, key):
+            raise AssertionError("hardware queried for a fresh key")
+
+        monkeypatch.setattr(Quartz, "CGEventSourceKeyState", fail)
+        assert replay(InputLocker([7, 8]), [(DOWN, 7, 0), (DOWN, 8, 4 * SECOND)]) == 1
+
+    def test_phantom_does_not_start_hold(self, trace_quartz, hardware):
+        locker = InputLocker([7, 8], hold_ms=500)
+        trace = [(DOWN, 7, 0), (DOWN, 8, 60 * SECOND), (DOWN, 8, 61 * SECOND)]
+        assert replay(locker, trace) is None
+        assert locker.chord_since is None
+
+    def test_stale_window_configurable(self, trace_quartz, hardware):
+        locker = InputLocker([7, 8])
+        locker.stale_ns = 100 * MS
+        assert replay(locker, [(DOWN, 7, 0), (DOWN, 8, 150)]) is None
+
+
+class TestResync:
+
+    def test_tap_reenable_drops_released_keys(self, trace_quartz, hardware):
+        hardware.add(1)
+        locker = InputLocker([7, 8])
+        events = recorder(locker)
+        # Tap disabled while X was down; its KeyUp never arrived.
+        trace = [(DOWN, 7, 0), (DOWN, 1, 5), (DISABLED, 0, 10), (DOWN, 8, 20)]
+        assert replay(locker, trace) is None
+        assert list(locker.pressed_keys) == [1, 8]
+        assert ("stale_keys", {"keycodes": [7], "cause": "tap_reenabled"}) in events
+
+    def test_tap_reenable_keeps_held_keys(self, trace_quartz, hardware):
+        hardware.add(7)
+        locker = InputLocker([7, 8])
+        assert replay(locker, [(DOWN, 7, 0), (DISABLED, 0, 10), (DOWN, 8, 20)]) == 2
+
+    def test_resync_resets_pending_hold(self, hardware):
+        locker = ChordLocker([7, 8], hold_ms=500)
+        locker.key_down(7, 0)
+        locker.key_down(8, 0)
+        assert locker.chord_since == 0
+        assert locker.resync_keys("wake") == [7, 8]
+        assert locker.chord_since is None
+
+    def test_without_backend_all_keys_dropped(self):
+        locker = ChordLocker([7, 8])
+        locker.key_down(7, 0)
+        assert locker.resync_keys("wake") == [7]
+        assert locker.pressed_keys == {}
+
+    def test_wake_resyncs_on_tap_thread(self, monkeypatch, hardware):
+        observers = []
+
+        class Center:
+            def addObserverForName_object_queue_usingBlock_(self, name, obj, queue, block):
+                observers.append((name, block))
+                return "token"
+
+            def removeObserver_(self, token):
+                observers.clear()
+
+        class Workspace:
+            center = Center()
+
+            @classmethod
+            def sharedWorkspace(cls):
+                return cls
+
+            @classmethod
+            def notificationCenter(cls):
+                return cls.center
+
+        appkit = types.ModuleType("AppKit")
+        appkit.NSWorkspace = Workspace
+        appkit.NSWorkspaceDidWakeNotification = "NSWorkspaceDidWakeNotification"
+        monkeypatch.setitem(sys.modules, "AppKit", appkit)
+        performed = []
+        monkeypatch.setattr(Quartz, "CFRunLoopPerformBlock",
+                            lambda loop, mode, block: performed.append(block))
+
+        locker = InputLocker([7, 8])
+        locker.key_down(7, 0)
+        locker._watch_wake()
+        assert observers[0][0] == "NSWorkspaceDidWakeNotification"
+        observers[0][1](None)
+        assert 7 in locker.pressed_keys  # deferred to the run loop
+        performed[0]()
+        assert locker.pressed_keys == {}
+        locker._unwatch_wake()
+        assert observers == []
+
+
+class TestX11:
+
+    def test_stale_key_checked_with_query_keymap(self):
+        class Event:
+            def __init__(self, detail, time):
+                self.type, self.detail, self.time = KEY_PRESS, detail, time
+
+        class Display:
+            keymap = [0] * 32
+
+            def query_keymap(self):
+                return self.keymap
+
+        locker = X11InputLocker([53, 54])
+        locker.display = Display()
+        locker.locked = True
+        locker.handle_event(Event(53, 0))
+        locker.handle_event(Event(54, 60 * SECOND))
+        assert locker.locked
+        locker.handle_event(Event(53, 60 * SECOND + 10))
+        assert not locker.locked
+
+        locker = X11InputLocker([53, 54])
+        locker.display = Display()
+        locker.display.keymap = [0] * 32
+        locker.display.keymap[53 >> 3] = 1 << (53 & 7)
+        locker.locked = True
+        locker.handle_event(Event(53, 0))
+        locker.handle_event(Event(54, 60 * SECOND))
+        assert not locker.locked
+
+
+@pytest.mark.timing
+class TestCost:
+    """Reconciliation must not add per-event work proportional to state."""
+
+    N = 20_000
+
+    def test_cost_independent_of_phantom_keys(self, trace_quartz, hardware):
+        events = []
+        for i in range(self.N):
+            events.append((DOWN, TraceEvent(7, i * MS)))
+            events.append((UP, TraceEvent(9, i * MS)))
+        clean = InputLocker([7, 8])
+        phantoms = InputLocker([7, 8])
+        for keycode in range(20, 120):
+            phantoms.pressed_keys[keycode] = 0
+        base = per_event(clean, events, 5)
+        loaded = per_event(phantoms, events, 5)
+        assert loaded < base * 1.5 + 200e-9, (base, loaded)
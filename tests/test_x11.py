@@ -0,0 +1,324 @@
+"""Tests for the X11 grab backend.
+
+The matching tests drive ``handle_event`` with stand-in events. The
+end-to-end test needs ``Xvfb`` and ``python-xlib``: it starts a private
+server, injects events through XTest and measures throughput and unlock
+latency.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+import macos_lock_cli as cli
+from macos_lock import api, backends, x11
+from macos_lock.keylayout import FIXED_KEYS
+from macos_lock.x11 import (
+    BUTTON_PRESS, KEY_PRESS, KEY_RELEASE, MOTION_NOTIFY, X11InputLocker,
+)
+
+X_KEY_X, X_KEY_C = 53, 54  # evdev+8 keycodes on a US layout
+
+
+class Event:
+    def __init__(self, type, detail=0, time=0):
+        self.type = type
+        self.detail = detail
+        self.time = time
+
+
+def feed(locker, events):
+    """Feeds events like the loop does, with a lookahead queue."""
+    queue = list(events)
+
+    def next_event():
+        return queue.pop(0) if queue else None
+
+    locker.locked = True
+    while queue and locker.locked:
+        locker.handle_event(queue.pop(0), next_event)
+
+
+class TestMatching:
+
+    def test_chord_unlocks(self):
+        reasons = []
+        locker = X11InputLocker([X_KEY_X, X_KEY_C], on_unlock=reasons.append)
+        feed(locker, [Event(KEY_PRESS, X_KEY_X, 0), Event(KEY_PRESS, X_KEY_C, 5)])
+        assert reasons == ["chord"]
+        assert not locker.locked
+
+    def test_pointer_events_counted(self):
+        locker = X11InputLocker([X_KEY_X, X_KEY_C])
+        feed(locker, [Event(MOTION_NOTIFY)] * 3 + [Event(BUTTON_PRESS)])
+        assert locker.blocked_counts[MOTION_NOTIFY] == 3
+        assert locker.blocked_counts[BUTTON_PRESS] == 1
+        assert locker.locked
+
+    def test_release_breaks_chord(self):
+        locker = X11InputLocker([X_KEY_X, X_KEY_C])
+        feed(locker, [Event(KEY_PRESS, X_KEY_X, 0), Event(KEY_RELEASE, X_KEY_X, 10),
+                      Event(KEY_PRESS, X_KEY_C, 20)])
+        assert locker.locked
+        assert locker.blocked_counts[KEY_RELEASE] == 1
+
+    def test_autorepeat_pairs_do_not_reset_hold(self):
+        locker = X11InputLocker([X_KEY_X, X_KEY_C], hold_ms=500)
+        events = [Event(KEY_PRESS, X_KEY_X, 0), Event(KEY_PRESS, X_KEY_C, 10)]
+        for t in range(510, 700, 30):
+            # Non-detectable auto-repeat: Release + Press with one timestamp.
+            events += [Event(KEY_RELEASE, X_KEY_C, t), Event(KEY_PRESS, X_KEY_C, t)]
+        feed(locker, events)
+        assert not locker.locked
+
+    def test_real_release_resets_hold(self):
+        locker = X11InputLocker([X_KEY_X, X_KEY_C], hold_ms=500)
+        feed(locker, [Event(KEY_PRESS, X_KEY_X, 0), Event(KEY_PRESS, X_KEY_C, 10),
+                      Event(KEY_RELEASE, X_KEY_C, 300), Event(KEY_PRESS, X_KEY_C, 320),
+                      Event(KEY_PRESS, X_KEY_C, 600)])
+        assert locker.locked
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            X11InputLocker(profile="mouse-only")
+
+    def test_keyboard_only_skips_pointer_grab(self):
+        assert not X11InputLocker(profile="keyboard-only").grab_pointer
+
+    def test_from_config(self):
+        locker = X11InputLocker.from_config({"unlock_keys": ["a", "s"],
+                                             "unlock_hold_ms": 300})
+        assert locker.unlock_keys == ["a", "s"]
+        assert locker.hold_ns == 300_000_000
+
+
+class TestBackendSelection:
+
+    def test_load_backend(self):
+        assert backends.load_backend("x11") == (X11InputLocker, x11.EVENT_NAMES)
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            backends.load_backend("wayland")
+
+    def test_cli_backend_flag(self):
+        assert cli.parse_args(["--backend", "x11"]).backend == "x11"
+
+    def test_cli_reports_missing_display(self, monkeypatch, capsys):
+        monkeypatch.setattr(cli, "load_config", lambda: {"unlock_keys": ["x", "c"]})
+
+        def no_display(self):
+            raise x11.X11Error("Cannot open X display")
+
+        monkeypatch.setattr(X11InputLocker, "run", no_display)
+        with pytest.raises(SystemExit):
+            cli.main(["--backend", "x11"])
+        assert "Cannot open X display" in capsys.readouterr().err
+
+    def test_api_session_uses_config_key_names(self, monkeypatch):
+        monkeypatch.setattr(api.config, "load_config",
+                            lambda: {"unlock_keys": ["a", "s"], "unlock_hold_ms": 0})
+        monkeypatch.setattr(X11InputLocker, "lock", lambda self: True)
+        session = api.LockSession(backend=X11InputLocker).start()
+        # Resolved against the X keymap at grab time, not macOS keycodes.
+        assert session.locker.unlock_keys == ["a", "s"]
+        session._cancel_timer()
+
+    def test_api_explicit_keycodes_skip_names(self, monkeypatch):
+        monkeypatch.setattr(api.config, "load_config", lambda: {"unlock_keys": ["a", "s"]})
+        monkeypatch.setattr(X11InputLocker, "lock", lambda self: True)
+        session = api.LockSession(backend=X11InputLocker,
+                                  unlock_keycodes=[X_KEY_X, X_KEY_C]).start()
+        assert session.locker.unlock_keys is None
+        assert session.locker.unlock_keycodes == {X_KEY_X, X_KEY_C}
+        session._cancel_timer()
+
+
+class TestKeyResolution:
+
+    def test_names_resolved_through_keymap(self):
+        XK = pytest.importorskip("Xlib.XK")
+
+        class FakeDisplay:
+            def keysym_to_keycode(self, keysym):
+                return {XK.string_to_keysym("x"): X_KEY_X,
+                        XK.string_to_keysym("BackSpace"): 22}.get(keysym, 0)
+
+        locker = X11InputLocker()
+        locker.display = FakeDisplay()
+        assert locker.resolve_keys(["x", "delete"]) == [X_KEY_X, 22]
+
+    def test_unresolved_name_rejects_chord(self):
+        pytest.importorskip("Xlib")
+
+        class FakeDisplay:
+            def keysym_to_keycode(self, keysym):
+                return X_KEY_X if keysym == ord("x") else 0
+
+        locker = X11InputLocker()
+        locker.display = FakeDisplay()
+        assert locker.resolve_keys(["f1", "x"]) == []
+        assert locker.resolve_keys(["x", "nope"]) == []
+        assert locker.resolve_keys(["x", "x"]) == []
+
+    def test_layout_names_have_keysyms(self):
+        XK = pytest.importorskip("Xlib.XK")
+        for name in FIXED_KEYS.values():
+            assert x11._keysym(name), name
+        assert x11._keysym("page_up") == XK.string_to_keysym("Prior")
+        assert x11._keysym("ö") == XK.string_to_keysym("odiaeresis")
+        assert x11._keysym("ß") == XK.string_to_keysym("ssharp")
+
+
+class TestWakePipe:
+
+    def test_closed_pipe_not_reused_after_loop_exits(self):
+        pytest.importorskip("Xlib")
+        idle_r, idle_w = os.pipe()
+
+        class IdleDisplay:
+            def pending_events(self):
+                return 0
+
+            def fileno(self):
+                return idle_r
+
+            def ungrab_pointer(self, time):
+                pass
+
+            ungrab_keyboard = ungrab_pointer
+
+            def flush(self):
+                pass
+
+        locker = X11InputLocker()
+        locker.display = IdleDisplay()
+        locker._wake_r, locker._wake_w = os.pipe()
+        locker.locked = True
+        thread = threading.Thread(target=locker._run_loop)
+        thread.start()
+        assert locker.unlock("api")
+        thread.join(2)
+        assert not thread.is_alive()
+        assert locker._wake_r is None and locker._wake_w is None
+        # A late release must not write into whatever reuses the fd number.
+        reused_r, reused_w = os.pipe()
+        try:
+            locker._release()
+            os.set_blocking(reused_r, False)
+            with pytest.raises(BlockingIOError):
+                os.read(reused_r, 1)
+        finally:
+            for fd in (idle_r, idle_w, reused_r, reused_w):
+                os.close(fd)
+
+
+# ---------------------------------------------------------------------------
+# End-to-end under Xvfb
+# ---------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def xvfb():
+    pytest.importorskip("Xlib")
+    if not shutil.which("Xvfb"):
+        pytest.skip("Xvfb not installed")
+    number = 90 + os.getpid() % 100
+    name = f":{number}"
+    proc = subprocess.Popen(["Xvfb", name, "-screen", "0", "800x600x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket = f"/tmp/.X11-unix/X{number}"
+    for _ in range(100):
+        if os.path.exists(socket):
+            break
+        time.sleep(0.05)
+    else:
+        proc.kill()
+        pytest.skip("Xvfb did not start")
+    yield name
+    proc.terminate()
+    proc.wait(5)
+
+
+class TestXvfbEndToEnd:
+
+    def _injector(self, name):
+        from Xlib import display
+        from Xlib.ext import xtest
+
+        d = display.Display(name)
+        if not d.query_extension("XTEST"):
+            pytest.skip("XTEST extension missing")
+        return d, xtest
+
+    def test_grab_storm_and_unlock_latency(self, xvfb):
+        from Xlib import X
+
+        unlocked = threading.Event()
+        unlocked_at = []
+
+        def on_unlock(reason):
+            unlocked_at.append(time.perf_counter())
+            unlocked.set()
+
+        locker = X11InputLocker(unlock_keys=["x", "c"], display_name=xvfb,
+                                on_unlock=on_unlock)
+        assert locker.lock()
+        d, xtest = self._injector(xvfb)
+        x_code, c_code = sorted(locker.unlock_keycodes)[0], sorted(locker.unlock_keycodes)[1]
+
+        n = 5000
+        for i in range(n):
+            xtest.fake_input(d, X.MotionNotify, x=i % 800, y=i % 600)
+        d.sync()
+        deadline = time.time() + 10
+        while locker.blocked_counts[MOTION_NOTIFY] < n * 0.9 and time.time() < deadline:
+            time.sleep(0.01)
+        assert locker.locked
+        assert locker.blocked_counts[MOTION_NOTIFY] >= n * 0.9
+
+        xtest.fake_input(d, X.KeyPress, x_code)
+        xtest.fake_input(d, X.KeyPress, c_code)
+        d.sync()
+        sent = time.perf_counter()
+        assert unlocked.wait(5)
+        latency = unlocked_at[0] - sent
+        assert latency < 0.5, latency
+        xtest.fake_input(d, X.KeyRelease, c_code)
+        xtest.fake_input(d, X.KeyRelease, x_code)
+        d.sync()
+        locker.lock_thread.join(2)
+        assert not locker.lock_thread.is_alive()
+
+        # Grab released: another client can now grab the keyboard.
+        status = d.screen().root.grab_keyboard(False, X.GrabModeAsync,
+                                               X.GrabModeAsync, X.CurrentTime)
+        assert status == X.GrabSuccess
+        d.ungrab_keyboard(X.CurrentTime)
+        d.close()
+
+    def test_api_chord_unlock(self, xvfb, monkeypatch):
+        from Xlib import X
+
+        monkeypatch.setenv("DISPLAY", xvfb)
+        monkeypatch.setattr(api.config, "load_config",
+                            lambda: {"unlock_keys": ["x", "c"], "unlock_hold_ms": 0})
+        d, xtest = self._injector(xvfb)
+        with api.locked(backend=X11InputLocker, timeout=10) as session:
+            for keycode in sorted(session.locker.unlock_keycodes):
+                xtest.fake_input(d, X.KeyPress, keycode)
+            d.sync()
+            assert session.wait(5) == "chord"
+        for keycode in sorted(session.locker.unlock_keycodes):
+            xtest.fake_input(d, X.KeyRelease, keycode)
+        d.sync()
+        d.close()
+
+    def test_unlock_from_other_thread(self, xvfb):
+        locker = X11InputLocker(unlock_keys=["x", "c"], display_name=xvfb)
+        assert locker.lock()
+        assert locker.unlock("api")
+        locker.lock_thread.join(2)
+        assert not locker.lock_thread.is_alive()